@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+from typing import AsyncIterable, AsyncIterator, Literal
+
+from loguru import logger
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.cache import invalidate_feeds
+from app.api.dao import PostDAO
+from app.api.shemas import SPostCreateWithAuthor
+from app.dao.replicas import open_read_session
+from app.exceptions import PostAlreadyExists
+
+
+async def split_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Splits a stream of byte chunks(e.g. request body) into lines
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+
+    if buffer:
+        yield buffer
+
+
+async def import_posts(session: AsyncSession, lines: AsyncIterable[bytes | str],
+                       author_id: int, chunk_size: int) -> dict:
+    """
+    Imports posts from JSONL stream, each line is a post in format of
+    `SPostCreateBase`. Posts are added by chunks, each chunk is committed,
+    so memory usage doesn't depend on the stream size.
+    Invalid lines and posts with taken titles don't stop the import.
+
+    Args:
+        session: Async SQLAlchemy session
+        lines: Stream of JSONL lines
+        author_id: Author of all imported posts
+        chunk_size: Number of posts added at once
+
+    Returns:
+        Dict with numbers of added and skipped posts
+        and reasons of skipping each line
+    """
+    report = {"added": 0, "skipped": 0, "errors": []}
+
+    async def add_chunk(chunk: list[tuple[int, SPostCreateWithAuthor]]):
+        posts = [post for _, post in chunk]
+        post_ids = await PostDAO.add_posts(session=session, posts=posts)
+        await session.commit()
+        await invalidate_feeds({tag for post in posts for tag in post.tags})
+
+        for (line_number, _), post_id in zip(chunk, post_ids):
+            if post_id:
+                report["added"] += 1
+            else:
+                report["skipped"] += 1
+                report["errors"].append({"line": line_number,
+                                         "message": PostAlreadyExists.detail})
+
+    chunk = []
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+
+        try:
+            post_dict = json.loads(line)
+            post_dict["author"] = author_id
+            chunk.append((line_number,
+                          SPostCreateWithAuthor.model_validate(post_dict)))
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                                for error in e.errors())
+            report["skipped"] += 1
+            report["errors"].append({"line": line_number, "message": message})
+            continue
+        except (ValueError, TypeError):
+            report["skipped"] += 1
+            report["errors"].append({"line": line_number,
+                                     "message": "Line is not a JSON object"})
+            continue
+
+        if len(chunk) >= chunk_size:
+            await add_chunk(chunk)
+            chunk = []
+
+    if chunk:
+        await add_chunk(chunk)
+
+    logger.info("Import finished: {added} posts added, {skipped} skipped",
+                added=report["added"], skipped=report["skipped"])
+    return report
+
+
+EXPORT_FIELDS = ["id", "title", "description", "content", "status",
+                 "author_id", "author_name", "tags", "created_at", "updated_at"]
+
+
+async def export_posts(author_id: int | None, format: Literal["ndjson", "csv"],
+                       chunk_size: int) -> AsyncIterator[str]:
+    """
+    Serializes published posts chunk by chunk.
+    Uses its own session on a replica, so can be consumed after request
+    dependencies are closed(e.g. by StreamingResponse).
+
+    Args:
+        author_id: Author's id for filtering
+        format: "ndjson" - JSON object per line,
+                "csv" - header and a row per post, tags are comma separated
+        chunk_size: Number of posts fetched at once
+
+    Yields:
+        Serialized chunks
+    """
+    if format == "csv":
+        yield ",".join(EXPORT_FIELDS) + "\r\n"
+
+    async with await open_read_session() as session:
+        async for posts in PostDAO.stream_posts(session=session, author_id=author_id,
+                                                chunk_size=chunk_size):
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+                for post in posts:
+                    writer.writerow({**post, "tags": ",".join(post["tags"])})
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(post, ensure_ascii=False) + "\n"
+                              for post in posts)
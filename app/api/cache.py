@@ -0,0 +1,62 @@
+from typing import Iterable
+from uuid import uuid4
+
+from app.cache.cache import create_cache
+from app.cache.singleflight import SingleFlight
+from app.config import settings
+
+# Validated published posts by id. Drafts are never cached
+post_cache = create_cache("post_info", maxsize=settings.POST_CACHE_SIZE,
+                          ttl=settings.POST_CACHE_TTL)
+
+# Pages of posts list by filters and generations of the filters
+feed_cache = create_cache("feed", maxsize=settings.FEED_CACHE_SIZE,
+                          ttl=settings.FEED_CACHE_TTL)
+feed_single_flight = SingleFlight()
+
+# Generation is a random token of the current state of posts matching
+# a filter. It's a part of feed cache keys, so replacing the token makes
+# all cached pages of the filter outdated. Tokens are never reused,
+# so a lost token just causes cache misses. Tokens are also ETags of
+# feeds. Feeds have no Last-Modified: HTTP dates are whole seconds, and
+# two generations of the same second would look like one version
+generation_cache = create_cache("feed_generation",
+                                maxsize=settings.GENERATION_CACHE_SIZE,
+                                ttl=settings.GENERATION_CACHE_TTL)
+
+POSTS_GENERATION = "posts"
+
+
+def tag_generation(tag: str) -> str:
+    return f"tag:{tag.lower()}"
+
+
+async def get_generation(name: str) -> str:
+    """
+    Returns current generation token, creating it if there is none
+    """
+    generation = await generation_cache.get(name)
+    if generation is None:
+        generation = uuid4().hex
+        await generation_cache.set(name, generation)
+    return generation
+
+
+async def get_feed_generations(tag: str | None, tag_match: str) -> list[str]:
+    """
+    Returns generations of the feed filter
+    """
+    generations = [await get_generation(POSTS_GENERATION)]
+    if tag and tag_match == "exact":
+        generations.append(await get_generation(tag_generation(tag)))
+    return generations
+
+
+async def invalidate_feeds(tag_names: Iterable[str] = ()) -> None:
+    """
+    Makes all cached feeds outdated after posts are added, deleted or
+    change status. Feeds filtered by given tags are made outdated
+    after tags of their posts change.
+    """
+    await generation_cache.invalidate(POSTS_GENERATION,
+                                      *map(tag_generation, tag_names))
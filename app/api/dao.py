@@ -1,13 +1,28 @@
-from typing import Optional
+from collections import Counter
+from typing import AsyncIterator, Literal, Optional, Sequence
 from loguru import logger
-from sqlalchemy import func, select
+from sqlalchemy import and_, delete, func, insert, literal, literal_column, or_, select, update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import defer, joinedload, lazyload, load_only, selectinload
 
-from app.api.shemas import PostFullResponse
-from app.dao.base import BaseDAO
-from app.api.models import Post, Tag, PostTag
+from app.api.cache import (POSTS_GENERATION, feed_cache, feed_single_flight, get_feed_generations,
+                           get_generation, post_cache)
+from app.api.search import get_search_backend, highlight
+from app.api.shemas import PostFullResponse, PostSearchResult, PostVersion, SPostCreateWithAuthor
+from app.api.utils import decode_cursor, decode_search_cursor, encode_cursor, encode_search_cursor
+from app.dao.base import BaseDAO, dialect_insert
+from app.dao.database import Timestamp
+from app.api.models import Post, PostCounter, Tag, PostTag
+from app.auth.models import User
+
+
+def _unindexed(column):
+    """
+    Returns the column as an expression, which can't be looked up
+    by indexes, so the planner drives the query by other conditions
+    """
+    return column.op("||")(literal_column("''"))
 
 
 class PostDAO(BaseDAO):
@@ -15,86 +30,301 @@ class PostDAO(BaseDAO):
 
     @classmethod
     async def get_post_list(cls, session: AsyncSession, author_id: Optional[int] = None, tag: Optional[str] = None,
-                            page: int = 1, page_size: int = 3) -> dict:
+                            page: int = 1, page_size: int = 3, cursor: Optional[str] = None,
+                            total: Literal["exact", "cached", "none"] = "exact",
+                            tag_match: Literal["exact", "prefix", "substring"] = "exact") -> dict:
         """
         Obtains list of published posts with optional filters and paging.
+        Posts are sorted from the newest to the oldest.
+
+        There are two paging modes:
+            * by page number - `page` is used and total numbers of posts
+              and pages are returned(see `total`);
+            * by cursor - `cursor` from the previous response is used.
+              Reading any page costs the same as reading the first one,
+              but total numbers aren't computed.
 
         Args:
             session: Async SQLAlchemy session
             author_id (optional): Author's id for filtering
-            tag (optional): Tag for filtering
+            tag (optional): Tag for filtering(see `tag_match`)
             page (optional): Page number (starting from 1)
             page_size(optinal): Number of posts per page(from 3 to 100)
+            cursor (optional): Token `next_cursor` of the previous page.
+                               If given, paging by cursor is used
+            total (optional): How to obtain number of posts in page number mode:
+                * "exact" - count rows matching the filters;
+                * "cached" - read from `PostCounter` table. Only exact tag
+                  match is cached, others fall back to "exact";
+                * "none" - skip counting, totals are None. Whether the next
+                  page exists is still shown by `next_cursor`
+            tag_match (optional): How posts are filtered by `tag`:
+                * "exact" - posts having the tag;
+                * "prefix" - posts having a tag starting with `tag`;
+                * "substring" - posts having a tag containing `tag`.
+                  Can't use indexes, so it's slow on large tables
 
         Returns:
-            Dict with info about number of posts, pages, list of posts
+            Dict with info about number of posts, pages, list of posts(dicts
+            shaped as `PostSummary`) and `next_cursor` token of the following
+            page(None on the last page)
+
+        Raises:
+            ValueError: if cursor is malformed
         """
         # params restrictions
         page_size = max(3, min(page_size, 100))
         page = max(1, page)
 
-        # load tables
-        base_query = select(Post).distinct().options(
-            joinedload(Post.user),
-            selectinload(Post.tags)
-        ).filter_by(status="published")
+        # Only columns shown in lists are read, content may be large
+        status_condition = Post.status == "published"
+        conditions = []
 
         # filtering by author
         if author_id is not None:
-            base_query = base_query.filter_by(author=author_id)
+            conditions.append(Post.author == author_id)
 
         # filteing by tag
+        tag_ids = None
         if tag:
-            base_query = base_query.join(Post.tags).filter(
-                Post.tags.any(
-                    Tag.name.ilike(f"%{tag.lower()}%")
+            tag = tag.lower()
+            if tag_match == "substring":
+                conditions.append(
+                    Post.tags.any(
+                        Tag.name.ilike(f"%{tag}%")
+                    )
                 )
-            )
+            else:
+                if tag_match == "prefix":
+                    # Range instead of LIKE, so the index on tag name is used
+                    upper_bound = tag[:-1] + chr(ord(tag[-1]) + 1)
+                    tag_filter = and_(Tag.name >= tag, Tag.name < upper_bound)
+                else:
+                    tag_filter = Tag.name == tag
+
+                # Semi-join. Unlike plain join it doesn't duplicate posts,
+                # so no DISTINCT is needed
+                tag_ids = select(Tag.id).filter(tag_filter)
+                rows_needed = page_size + 1 if cursor is not None else page * page_size + 1
+                if await cls._is_common_tag(session, tag_ids, author_id, rows_needed):
+                    # Posts of a common tag are met often, so the feed index
+                    # is walked probing each post's links until the page is filled
+                    conditions.append(
+                        select(PostTag.post_id)
+                        .filter(PostTag.post_id == Post.id, PostTag.tag_id.in_(tag_ids))
+                        .exists()
+                    )
+                else:
+                    # Walking for a rare tag costs as much as the table size.
+                    # Posts are read by ids from the tag's links via index on
+                    # (tag_id, post_id) and only they are sorted. Status is
+                    # hidden from its index, otherwise the planner walks it
+                    tagged_posts = select(PostTag.post_id).filter(PostTag.tag_id.in_(tag_ids))
+                    conditions.append(Post.id.in_(tagged_posts))
+                    status_condition = _unindexed(Post.status) == "published"
+
+        # Stable order is required by both paging modes.
+        # Id breaks ties between posts created at the same second.
+        # Matches post's feed indexes, so rows are read already sorted
+        base_query = (
+            select(Post.id, Post.author, Post.title, Post.description,
+                   Post.created_at, Post.status, Post.tag_list,
+                   User.name.label("author_name"))
+            .outerjoin(User, User.id == Post.author)
+            .filter(status_condition, *conditions)
+            .order_by(Post.created_at.desc(), Post.id.desc())
+        )
+
+        if cursor is not None:
+            last_created_at, last_id = decode_cursor(cursor)
+            last_created_at = literal(last_created_at, Timestamp)
+
+            # Continue right after the last seen post instead of skipping
+            # OFFSET rows. One extra row shows whether the next page exists
+            keyset_query = base_query.filter(
+                or_(Post.created_at < last_created_at,
+                    and_(Post.created_at == last_created_at,
+                         Post.id < last_id))
+            ).limit(page_size + 1)
+
+            result = await session.execute(keyset_query)
+            rows = result.all()
+            next_cursor = None
+            if len(rows) > page_size:
+                rows = rows[:page_size]
+                next_cursor = encode_cursor(rows[-1].created_at,
+                                            rows[-1].id)
+            posts = cls._summaries(rows)
+
+            logger.debug("Page after cursor {cursor} fetched with {count} posts, "
+                         "filters: author_id={author_id}, tag={tag}({tag_match})",
+                         count=len(posts), cursor=cursor, author_id=author_id,
+                         tag=tag, tag_match=tag_match, sampled=True)
+
+            return {
+                "cursor": cursor,
+                "next_cursor": next_cursor,
+                "posts": posts
+            }
 
         # count rows
-        count_query = select(func.count()).select_from(base_query.subquery())
-        number_of_rows = await session.scalar(count_query)
+        if total == "cached" and tag and tag_match != "exact":
+            total = "exact"
+
+        if total == "exact" and tag_ids is not None:
+            # Counted by the tag's links. Tags matching a prefix may share posts
+            counted = func.count(PostTag.post_id.distinct()) if tag_match == "prefix" else func.count()
+            link_conditions = [PostTag.tag_id.in_(tag_ids),
+                               _unindexed(Post.status) == "published"]
+            if author_id is not None:
+                link_conditions.append(Post.author == author_id)
+            count_query = (
+                select(counted)
+                .select_from(PostTag)
+                .join(Post, Post.id == PostTag.post_id)
+                .filter(*link_conditions)
+            )
+            number_of_rows = await session.scalar(count_query)
+        elif total == "exact":
+            # Neither authors nor sorting matter for counting
+            count_query = select(func.count()).select_from(Post).filter(status_condition, *conditions)
+            number_of_rows = await session.scalar(count_query)
+        elif total == "cached":
+            tag_id = None
+            if tag:
+                tag_id = await session.scalar(select(Tag.id).filter_by(name=tag))
+
+            # Unknown tag has no posts
+            number_of_rows = 0
+            if not tag or tag_id is not None:
+                number_of_rows = await PostCounterDAO.get_count(session=session,
+                                                                author_id=author_id,
+                                                                tag_id=tag_id)
+        else:
+            number_of_rows = None
 
         # Return empty page if nothing found in db
-        if not number_of_rows:
+        if number_of_rows == 0:
             return {
                 "page": page,
                 "total_pages": 0,
                 "number_of_rows": 0,
+                "next_cursor": None,
                 "posts": []
             }
 
         # Ceiled number of pages
-        total_pages = (number_of_rows + page_size - 1) // page_size
+        total_pages = None
+        if number_of_rows is not None:
+            total_pages = (number_of_rows + page_size - 1) // page_size
 
-        # Select required page
+        # Select required page. One extra row shows whether the next page exists
         offset = (page - 1) * page_size
-        paginated_query = base_query.offset(offset).limit(page_size)
+        paginated_query = base_query.offset(offset).limit(page_size + 1)
 
         # Perfom constructed query
         result = await session.execute(paginated_query)
-        posts = result.scalars().all()
-        posts = [PostFullResponse.model_validate(post) for post in posts]
+        rows = result.all()
 
-        # Loggin
-        filters = []
-        if author_id is not None:
-            filters.append(f"author_id={author_id}")
-        if tag:
-            filters.append(f"tag={tag}")
-        filter_str = " & ".join(filters) if filters else "no filters"
+        # Allows to switch to paging by cursor from any page
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        posts = cls._summaries(rows)
 
-        logger.info(
-            f"Page {page} fetched with {
-                len(posts)} posts, filters: {filter_str}")
+        logger.debug("Page {page} fetched with {count} posts, "
+                     "filters: author_id={author_id}, tag={tag}({tag_match})",
+                     page=page, count=len(posts), author_id=author_id,
+                     tag=tag, tag_match=tag_match, sampled=True)
 
         return {
             "page": page,
             "total_pages": total_pages,
             "number_of_rows": number_of_rows,
+            "next_cursor": next_cursor,
             "posts": posts
         }
 
+    @staticmethod
+    async def _is_common_tag(session: AsyncSession, tag_ids, author_id: Optional[int],
+                             rows_needed: int) -> bool:
+        """
+        Tells whether posts with the tags are better found by walking
+        the feed index than by reading the tags' links.
+
+        The walk reads about `rows_needed * published / tagged` posts,
+        reading the links sorts all `tagged` posts. Numbers are taken
+        from `PostCounter`, tags without counters are treated as rare.
+
+        Args:
+            session: Async SQLAlchemy session
+            tag_ids: Query selecting ids of the tags
+            author_id (optional): Author's id the feed is filtered by
+            rows_needed: Number of rows to read from the start of the feed
+        """
+        published = await PostCounterDAO.get_count(session=session, author_id=author_id)
+        query = (
+            select(func.coalesce(func.sum(PostCounter.count), 0))
+            .filter(PostCounter.author_id == (author_id or 0),
+                    PostCounter.tag_id.in_(tag_ids))
+        )
+        tagged = await session.scalar(query) or 0
+        return tagged * tagged > rows_needed * published
+
+    @staticmethod
+    def _summaries(rows: Sequence) -> list[dict]:
+        """
+        Maps rows of posts list to dicts shaped as `PostSummary`.
+        Rows come from database, so they aren't validated again.
+        """
+        return [
+            {
+                "id": row.id,
+                "author": row.author,
+                "title": row.title,
+                "description": row.description,
+                "created_at": row.created_at,
+                "status": row.status,
+                "tags": row.tag_list,
+                "author_id": row.author if row.author_name is not None else None,
+                "author_name": row.author_name
+            }
+            for row in rows
+        ]
+
+    @classmethod
+    async def get_cached_post_list(cls, session: AsyncSession, author_id: Optional[int] = None,
+                                   tag: Optional[str] = None, page: int = 1, page_size: int = 3,
+                                   cursor: Optional[str] = None,
+                                   total: Literal["exact", "cached", "none"] = "exact",
+                                   tag_match: Literal["exact", "prefix", "substring"] = "exact") -> dict:
+        """
+        Same as `get_post_list`, but the result is cached by filters.
+        Concurrent calls with the same filters make a single query.
+        """
+        # Normalize filters, so equal queries have equal keys
+        tag = tag.lower() if tag else None
+        page_size = max(3, min(page_size, 100))
+        page = 1 if cursor is not None else max(1, page)
+
+        generations = await get_feed_generations(tag, tag_match)
+        key = (*generations, author_id, tag, tag_match,
+               page, page_size, cursor, total)
+
+        result = await feed_cache.get(key)
+        if result is not None:
+            return result
+
+        async def load() -> dict:
+            result = await cls.get_post_list(session=session, author_id=author_id, tag=tag,
+                                             page=page, page_size=page_size, cursor=cursor,
+                                             total=total, tag_match=tag_match)
+            await feed_cache.set(key, result)
+            return result
+
+        return await feed_single_flight.do(key, load)
+
     @classmethod
     async def get_full_post_info(
             cls, session: AsyncSession, post_id: int, user_id: Optional[int] = None):
@@ -102,7 +332,12 @@ class PostDAO(BaseDAO):
         Returns full post information.
         If post is public - info is available for all users.
         For drafts info is available only for author.
+        Published posts are cached.
         """
+        cached_post = await post_cache.get(post_id)
+        if cached_post is not None:
+            return cached_post
+
         # Query with loading data about user(author) and tags
         query = (
             select(Post)
@@ -130,7 +365,30 @@ class PostDAO(BaseDAO):
                 "status": "error"
             }
 
-        return post
+        post_info = PostFullResponse.model_validate(post)
+        if post.status == "published":
+            await post_cache.set(post_id, post_info)
+
+        return post_info
+
+    @classmethod
+    async def get_post_version(cls, session: AsyncSession, post_id: int) -> Optional[PostVersion]:
+        """
+        Returns post's status, author, tags and time of the last change
+        without loading the post itself. Cached posts take no query.
+
+        Returns:
+            Version of the post or None if post isn't found
+        """
+        cached_post = await post_cache.get(post_id)
+        if cached_post is not None:
+            return PostVersion.model_validate(cached_post)
+
+        query = select(Post.status, Post.author, Post.updated_at,
+                       Post.tag_list.label("tags")).filter_by(id=post_id)
+        result = await session.execute(query)
+        row = result.one_or_none()
+        return PostVersion.model_validate(row) if row is not None else None
 
     @classmethod
     async def change_post_status(
@@ -187,6 +445,17 @@ class PostDAO(BaseDAO):
             post.status = new_status
             await session.flush()
 
+            # Only published posts are searched
+            if new_status == "published":
+                await PostSearchDAO.index_posts(session=session, post_ids=[post_id])
+            else:
+                await PostSearchDAO.remove_posts(session=session, post_ids=[post_id])
+
+            # Only published posts are counted
+            tag_ids = await PostTagDAO.get_tag_ids(session=session, post_id=post_id)
+            await PostCounterDAO.count_post(session=session, author_id=post.author, tag_ids=tag_ids,
+                                            delta=1 if new_status == "published" else -1)
+
             return {
                 "message": f"Post's status has successfully changed to {new_status}'.",
                 "status": "success",
@@ -234,6 +503,12 @@ class PostDAO(BaseDAO):
                     'status': 'error'
                 }
 
+            if post.status == "published":
+                tag_ids = await PostTagDAO.get_tag_ids(session=session, post_id=post_id)
+                await PostCounterDAO.count_post(session=session, author_id=post.author,
+                                                tag_ids=tag_ids, delta=-1)
+                await PostSearchDAO.remove_posts(session=session, post_ids=[post_id])
+
             # Remove post
             await session.delete(post)
             await session.flush()
@@ -251,93 +526,581 @@ class PostDAO(BaseDAO):
             }
 
 
+    @classmethod
+    async def add_posts(cls, session: AsyncSession,
+                        posts: list[SPostCreateWithAuthor]) -> list[int | None]:
+        """
+        Adds published posts with their tags.
+        Number of queries doesn't depend on number of posts.
+        Posts with already taken title(in the database or earlier
+        in the list) are skipped.
+
+        Args:
+            session: Async SQLAlchemy session
+            posts: Posts to add
+
+        Returns:
+            Ids of added posts in order of the given ones. None for skipped posts
+        """
+        if not posts:
+            return []
+
+        # Only the first post with each title is inserted
+        unique_posts = {}
+        for post in posts:
+            unique_posts.setdefault(post.title, post)
+
+        try:
+            # Posts with titles existing in db are skipped by ON CONFLICT
+            query = (
+                dialect_insert(session, Post)
+                .values([post.model_dump(exclude={"tags"})
+                         for post in unique_posts.values()])
+                .on_conflict_do_nothing(index_elements=["title"])
+                .returning(Post.id, Post.title)
+            )
+            result = await session.execute(query)
+            added_ids = {title: id for id, title in result.all()}
+
+        except SQLAlchemyError as e:
+            await session.rollback()
+            logger.error("Internal error while adding {count} posts: {e}",
+                         count=len(posts), e=e)
+            raise e
+
+        post_ids = [added_ids.get(post.title) if unique_posts[post.title] is post else None
+                    for post in posts]
+        added_posts = [(post_id, post)
+                       for post_id, post in zip(post_ids, posts) if post_id]
+        logger.info("{added} of {count} posts have been added",
+                    added=len(added_posts), count=len(posts))
+
+        # Resolve tags of all posts with one upsert
+        tag_names = [name for _, post in added_posts for name in post.tags]
+        tag_ids = await TagDAO.add_tags(session=session, tag_names=tag_names)
+        tag_ids = dict(zip(dict.fromkeys(name.lower() for name in tag_names), tag_ids))
+
+        post_tag_pairs = []
+        deltas = Counter()
+        for post_id, post in added_posts:
+            post_tag_ids = [tag_ids[name]
+                            for name in dict.fromkeys(name.lower() for name in post.tags)]
+            post_tag_pairs.extend({"post_id": post_id, "tag_id": tag_id}
+                                  for tag_id in post_tag_ids)
+            deltas.update(PostCounterDAO.post_deltas(post.author, post_tag_ids, 1))
+
+        if post_tag_pairs:
+            await PostTagDAO.add_post_tags(session=session,
+                                           post_tag_pairs=post_tag_pairs)
+        await PostCounterDAO.update_counters(session=session, deltas=deltas)
+        await PostSearchDAO.index_posts(session=session,
+                                        post_ids=[post_id for post_id, _ in added_posts])
+
+        return post_ids
+
+
+    @classmethod
+    async def stream_posts(cls, session: AsyncSession, author_id: Optional[int] = None,
+                           chunk_size: int = 500) -> AsyncIterator[list[dict]]:
+        """
+        Iterates over all published posts using server side cursor,
+        so memory usage depends on chunk size rather than number of posts.
+
+        Args:
+            session: Async SQLAlchemy session
+            author_id (optional): Author's id for filtering
+            chunk_size (optional): Number of posts fetched at once
+
+        Yields:
+            Lists of posts as dicts with author's name and tag names
+        """
+        query = select(
+            Post.id, Post.title, Post.description, Post.content, Post.status,
+            Post.author, Post.created_at, Post.updated_at, Post.tag_list
+        ).filter_by(status="published")
+
+        if author_id is not None:
+            query = query.filter_by(author=author_id)
+
+        query = query.order_by(Post.id).execution_options(yield_per=chunk_size)
+        result = await session.stream(query)
+
+        async for rows in result.partitions():
+            # Batch load names of authors for the whole chunk
+            authors_query = select(User.id, User.name).filter(
+                User.id.in_({row.author for row in rows}))
+            author_names = dict((await session.execute(authors_query)).tuples().all())
+
+            yield [{
+                "id": row.id,
+                "title": row.title,
+                "description": row.description,
+                "content": row.content,
+                "status": row.status,
+                "author_id": row.author,
+                "author_name": author_names.get(row.author),
+                "tags": [tag["name"] for tag in row.tag_list],
+                "created_at": row.created_at.isoformat(),
+                "updated_at": row.updated_at.isoformat()
+            } for row in rows]
+
+            logger.debug("Streamed chunk of {count} posts", count=len(rows))
+
+
 class TagDAO(BaseDAO):
     model = Tag
 
+    @classmethod
+    async def get_tag_cloud(cls, session: AsyncSession, limit: int = 50) -> list[dict]:
+        """
+        Returns the most used tags with numbers of their published posts.
+        Numbers are read from post counters, so posts aren't aggregated.
+
+        Args:
+            session: Async SQLAlchemy session
+            limit: Max number of tags
+
+        Returns:
+            List of dicts with tag's `id`, `name` and `count`, the most used first
+        """
+        query = (
+            select(Tag.id, Tag.name, PostCounter.count)
+            .join(Tag, Tag.id == PostCounter.tag_id)
+            .filter(PostCounter.author_id == 0, PostCounter.count > 0)
+            .order_by(PostCounter.count.desc(), Tag.name)
+            .limit(limit)
+        )
+        result = await session.execute(query)
+        return [row._asdict() for row in result.all()]
+
+    @classmethod
+    async def get_cached_tag_cloud(cls, session: AsyncSession, limit: int = 50) -> list[dict]:
+        """
+        Same as `get_tag_cloud`, but cached until posts change
+        """
+        token = await get_generation(POSTS_GENERATION)
+        key = (token, "tag_cloud", limit)
+        tags = await feed_cache.get(key)
+        if tags is None:
+            tags = await cls.get_tag_cloud(session=session, limit=limit)
+            await feed_cache.set(key, tags)
+        return tags
+
+    @classmethod
+    async def delete_tag(cls, session: AsyncSession, tag_name: str) -> dict:
+        """
+        Deletes the tag with its links to posts and counters.
+        Cached posts and feeds aren't touched, since they could be cached
+        again before commit: the caller invalidates them after commit.
+
+        Args:
+            session: Async SQLAlchemy session
+            tag_name: Name of the tag
+
+        Returns:
+            Dict with info about operation. On success it also has
+            `post_ids` and `tag_names` to invalidate
+        """
+        tag_name = tag_name.lower()
+        tag_id = await session.scalar(select(Tag.id).filter_by(name=tag_name))
+        if tag_id is None:
+            return {
+                "message": f"Tag {tag_name} not found.",
+                "status": "error"
+            }
+
+        links = await PostTagDAO.find_links(session, PostTag.tag_id == tag_id)
+        # Links are deleted explicitly, since SQLite doesn't cascade without
+        # foreign keys pragma, and ids of deleted tags may be reused
+        await session.execute(delete(PostTag).filter_by(tag_id=tag_id))
+        await session.execute(delete(Tag).filter_by(id=tag_id))
+        post_ids, tag_names = await PostTagDAO.unlink(session=session, links=links)
+        # Counters of the tag are dropped rather than left at zero
+        await session.execute(delete(PostCounter).filter_by(tag_id=tag_id))
+
+        return {
+            "message": f"Tag {tag_name} has been successfully deleted from {len(post_ids)} posts.",
+            "status": "success",
+            "post_ids": post_ids,
+            "tag_names": tag_names
+        }
+
     @classmethod
     async def add_tags(cls, session: AsyncSession,
                        tag_names: list[str]) -> list[int]:
         """
-        Adds tags to the database.
+        Adds tags to the database. Existing tags are reused.
+        Takes 2 queries regardless of number of tags.
 
         Args:
             session: Async SQLAlchemy session
-            tag_name: List of tag names to add
+            tag_names: List of tag names to add
 
         Returns:
-            List of tags id
+            List of tags id in order of the given names(without duplicates)
         """
-        tag_ids = []
-        for tag_name in tag_names:
-            # Only lower case is allowed
-            tag_name = tag_name.lower()
+        # Only lower case is allowed. Drop duplicates keeping the order
+        tag_names = list(dict.fromkeys(name.lower() for name in tag_names))
+        if not tag_names:
+            return []
 
-            # Find tag in the db
-            query = select(Tag).filter_by(name=tag_name)
+        try:
+            # Find existing tags
+            query = select(Tag.id, Tag.name).filter(Tag.name.in_(tag_names))
             result = await session.execute(query)
-            tag = result.scalar_one_or_none()
+            tag_ids = {name: id for id, name in result.all()}
 
-            # If tag exists - simply add it to the return list
-            if tag:
-                tag_ids.append(tag.id)
+            # Add the rest at once. Tags added concurrently are skipped
+            new_names = [name for name in tag_names if name not in tag_ids]
+            if new_names:
+                query = (
+                    dialect_insert(session, Tag)
+                    .values([{"name": name} for name in new_names])
+                    .on_conflict_do_nothing(index_elements=["name"])
+                    .returning(Tag.id, Tag.name)
+                )
+                result = await session.execute(query)
+                tag_ids.update({name: id for id, name in result.all()})
+                logger.info("Tags {tags} have been successfully added to the database",
+                            tags=new_names)
 
-            # Otherwise add to db and add its id to the return list
-            else:
-                new_tag = Tag(name=tag_name)
-                session.add(new_tag)
-                try:
-                    await session.flush()
-                    logger.info(
-                        f"Tag '{tag_name}' has been successfully added to the database.")
-                    tag_ids.append(new_tag.id)
+            # Rare case of concurrent adding: take ids of skipped tags
+            skipped_names = [name for name in new_names if name not in tag_ids]
+            if skipped_names:
+                query = select(Tag.id, Tag.name).filter(
+                    Tag.name.in_(skipped_names))
+                result = await session.execute(query)
+                tag_ids.update({name: id for id, name in result.all()})
 
-                except SQLAlchemyError as e:
-                    await session.rollback()
-                    logger.error(
-                        f"Internal error occured while adding the tag '{tag_name}': {e}")
-                    raise e
+        except SQLAlchemyError as e:
+            await session.rollback()
+            logger.error("Internal error occured while adding tags {tags}: {e}",
+                         tags=tag_names, e=e)
+            raise e
 
-        return tag_ids
+        return [tag_ids[name] for name in tag_names]
 
 
 class PostTagDAO(BaseDAO):
     model = PostTag
 
+    @classmethod
+    async def get_tag_ids(cls, session: AsyncSession, post_id: int) -> list[int]:
+        """
+        Returns ids of all tags of the given post
+        """
+        query = select(PostTag.tag_id).filter_by(post_id=post_id)
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
     @classmethod
     async def add_post_tags(cls, session: AsyncSession,
                             post_tag_pairs: list[dict]) -> None:
         """
         Method for multiple linkage post-tag in the database.
+        All pairs are inserted with a single query.
 
         Args:
             session: Async SQLAlchemy session
             post_tag_pairs: List of dicts-pairs with keys 'post_id' and 'tag_id'
         """
-        # Create all instanses
-        post_tag_insts = []
+        # Collect valid pairs
+        post_tag_values = []
         for pair in post_tag_pairs:
             post_id = pair.get('post_id')
             tag_id = pair.get('tag_id')
 
             if post_id and tag_id:
-                post_tag = PostTag(post_id=post_id, tag_id=tag_id)
-                post_tag_insts.append(post_tag)
+                post_tag_values.append({"post_id": post_id, "tag_id": tag_id})
 
             else:
-                logger.warning(f"Skipped a parametr in pair: {pair}")
+                logger.warning("Skipped a parametr in pair: {pair}", pair=pair)
 
-        if not post_tag_insts:
+        if not post_tag_values:
             logger.warning("No valid or any data to add in PostTag")
             return
 
-        session.add_all(post_tag_insts)
         try:
-            await session.flush()
-            logger.info(
-                f"{len(post_tag_insts)} pairs post-tag successfully added.")
+            await session.execute(insert(PostTag), post_tag_values)
+            logger.debug("{count} pairs post-tag successfully added",
+                         count=len(post_tag_values))
+
+            await cls.update_tag_lists(session=session,
+                                       post_ids=[pair["post_id"] for pair in post_tag_values])
 
         except SQLAlchemyError as e:
             await session.rollback()
-            logger.error(
-                f"Internall error while addid pairs post-tag in database: {e}")
+            logger.error("Internall error while addid pairs post-tag in database: {e}", e=e)
             raise e
+
+    @classmethod
+    async def update_tag_lists(cls, session: AsyncSession, post_ids: list[int]) -> None:
+        """
+        Copies current tags of the posts to their `tag_list` column.
+        Must be called after tags of posts change.
+
+        Args:
+            session: Async SQLAlchemy session
+            post_ids: Ids of posts whose tags changed
+        """
+        tag_lists = {post_id: [] for post_id in post_ids}
+        if not tag_lists:
+            return
+
+        query = (
+            select(PostTag.post_id, Tag.id, Tag.name)
+            .join(Tag, Tag.id == PostTag.tag_id)
+            .filter(PostTag.post_id.in_(tag_lists))
+            .order_by(PostTag.post_id, Tag.id)
+        )
+        result = await session.execute(query)
+        for post_id, tag_id, tag_name in result.all():
+            tag_lists[post_id].append({"id": tag_id, "name": tag_name})
+
+        # Bulk update by primary key, one statement for all posts
+        await session.execute(update(Post), [{"id": post_id, "tag_list": tag_list}
+                                             for post_id, tag_list in tag_lists.items()])
+
+    @classmethod
+    async def find_links(cls, session: AsyncSession, *conditions) -> list:
+        """
+        Returns pairs post-tag matching conditions with post's author
+        and status and tag's name, as `unlink` expects them
+        """
+        query = (
+            select(PostTag.post_id, PostTag.tag_id, Post.author, Post.status,
+                   Tag.name.label("tag_name"))
+            .join(Post, Post.id == PostTag.post_id)
+            .join(Tag, Tag.id == PostTag.tag_id)
+            .filter(*conditions)
+        )
+        result = await session.execute(query)
+        return list(result.all())
+
+    @classmethod
+    async def unlink(cls, session: AsyncSession, links: list) -> tuple[list[int], set[str]]:
+        """
+        Updates posts after their pairs post-tag were deleted: rewrites
+        tag lists and removes published posts from counters of the tags.
+
+        Args:
+            session: Async SQLAlchemy session
+            links: Deleted pairs returned by `find_links` before deleting
+
+        Returns:
+            Ids of the posts and names of the tags. Their cached posts
+            and feeds must be invalidated after commit
+        """
+        if not links:
+            return [], set()
+
+        deltas = Counter()
+        for link in links:
+            if link.status == "published":
+                deltas[(0, link.tag_id)] -= 1
+                deltas[(link.author, link.tag_id)] -= 1
+        post_ids = list(dict.fromkeys(link.post_id for link in links))
+
+        await cls.update_tag_lists(session=session, post_ids=post_ids)
+        await PostCounterDAO.update_counters(session=session, deltas=deltas)
+        return post_ids, {link.tag_name for link in links}
+
+    @classmethod
+    async def remove_post_tag(cls, session: AsyncSession, post_id: int,
+                              tag_name: str, user_id: int) -> dict:
+        """
+        Removes the tag from the post. Available only for post's author.
+        Cached posts and feeds are invalidated by the caller after commit.
+
+        Args:
+            session: Async SQLAlchemy session
+            post_id: Id of the post
+            tag_name: Name of the tag to remove
+            user_id: Id of user that tries to remove the tag
+
+        Returns:
+            Dict with info about operation. On success it also has
+            `post_ids` and `tag_names` to invalidate
+        """
+        tag_name = tag_name.lower()
+        author = await session.scalar(select(Post.author).filter_by(id=post_id))
+        if author is None:
+            return {
+                "message": f"Post with ID {post_id} not found.",
+                "status": "error"
+            }
+
+        if author != user_id:
+            return {
+                "message": "You haven't permissions to change this post",
+                "status": "error"
+            }
+
+        links = await cls.find_links(session, PostTag.post_id == post_id, Tag.name == tag_name)
+        if not links:
+            return {
+                "message": f"Post with ID {post_id} has no tag {tag_name}.",
+                "status": "error"
+            }
+
+        await session.execute(delete(PostTag).filter_by(post_id=post_id, tag_id=links[0].tag_id))
+        post_ids, tag_names = await cls.unlink(session=session, links=links)
+        return {
+            "message": f"Tag {tag_name} has been successfully removed from post with ID {post_id}.",
+            "status": "success",
+            "post_ids": post_ids,
+            "tag_names": tag_names
+        }
+
+
+class PostCounterDAO(BaseDAO):
+    model = PostCounter
+
+    @classmethod
+    async def get_count(cls, session: AsyncSession, author_id: Optional[int] = None,
+                        tag_id: Optional[int] = None) -> int:
+        """
+        Returns number of published posts with given author and tag
+
+        Args:
+            session: Async SQLAlchemy session
+            author_id (optional): Author's id. If None, any author matches
+            tag_id (optional): Tag's id. If None, any tag matches
+        """
+        query = select(PostCounter.count).filter_by(author_id=author_id or 0,
+                                                    tag_id=tag_id or 0)
+        count = await session.scalar(query)
+        return count or 0
+
+    @classmethod
+    async def update_counters(cls, session: AsyncSession,
+                              deltas: dict[tuple[int, int], int]) -> None:
+        """
+        Adds deltas to counters in a single query. Missing counters are created.
+
+        Args:
+            session: Async SQLAlchemy session
+            deltas: Mapping of pairs (author_id, tag_id) to value to add
+        """
+        values = [{"author_id": author_id, "tag_id": tag_id, "count": delta}
+                  for (author_id, tag_id), delta in deltas.items() if delta]
+        if not values:
+            return
+
+        query = dialect_insert(session, PostCounter).values(values)
+        query = query.on_conflict_do_update(
+            index_elements=["author_id", "tag_id"],
+            set_={"count": PostCounter.count + query.excluded.count,
+                  "updated_at": func.now()}
+        )
+        try:
+            await session.execute(query)
+            logger.debug("{count} post counters updated", count=len(values))
+        except SQLAlchemyError as e:
+            logger.error("Internal error while updating post counters: {e}", e=e)
+            raise
+
+    @classmethod
+    async def count_post(cls, session: AsyncSession, author_id: int,
+                         tag_ids: list[int], delta: int) -> None:
+        """
+        Adds a published post to all counters it matches(delta=1)
+        or removes it from them(delta=-1)
+
+        Args:
+            session: Async SQLAlchemy session
+            author_id: Post's author id
+            tag_ids: Ids of post's tags
+            delta: Value to add
+        """
+        await cls.update_counters(session=session,
+                                  deltas=cls.post_deltas(author_id, tag_ids, delta))
+
+    @staticmethod
+    def post_deltas(author_id: int, tag_ids: list[int], delta: int) -> Counter:
+        """
+        Returns deltas of all counters matching a post.
+        Several posts' deltas can be summed up and updated at once.
+        """
+        deltas = Counter({(0, 0): delta, (author_id, 0): delta})
+        for tag_id in set(tag_ids):
+            deltas[(0, tag_id)] += delta
+            deltas[(author_id, tag_id)] += delta
+        return deltas
+
+
+class PostSearchDAO(BaseDAO):
+    """
+    Full-text search of published posts. Index is kept by backend
+    of the database, see app/api/search.py
+    """
+    model = Post
+
+    @classmethod
+    async def index_posts(cls, session: AsyncSession, post_ids: list[int]) -> None:
+        """
+        Adds published posts to search index. Must be called after
+        the posts are flushed.
+        """
+        await get_search_backend(session).index_posts(session=session, post_ids=post_ids)
+
+    @classmethod
+    async def remove_posts(cls, session: AsyncSession, post_ids: list[int]) -> None:
+        """
+        Removes posts from search index
+        """
+        await get_search_backend(session).remove_posts(session=session, post_ids=post_ids)
+
+    @classmethod
+    async def search(cls, session: AsyncSession, terms: list[str], limit: int = 10,
+                     cursor: Optional[str] = None) -> dict:
+        """
+        Finds published posts containing all the words, best matches first.
+        Content of posts isn't loaded.
+
+        Args:
+            session: Async SQLAlchemy session
+            terms: Words of query made by `parse_query`
+            limit: Number of posts in a page
+            cursor: Token `next_cursor` of the previous page
+
+        Returns:
+            Dict with cursors and found posts with snippets
+
+        Raises:
+            ValueError: if cursor is malformed
+        """
+        after = decode_search_cursor(cursor) if cursor else None
+        backend = get_search_backend(session)
+        matches = await backend.search(session=session, terms=terms,
+                                       limit=limit + 1, after=after)
+
+        next_cursor = None
+        if len(matches) > limit:
+            matches = matches[:limit]
+            next_cursor = encode_search_cursor(matches[-1].rank, matches[-1].post_id)
+
+        query = (
+            select(Post)
+            .options(defer(Post.content), defer(Post.updated_at),
+                     joinedload(Post.user).options(load_only(User.id, User.name), lazyload(User.role)),
+                     selectinload(Post.tags))
+            .filter(Post.id.in_([match.post_id for match in matches]))
+        )
+        result = await session.execute(query)
+        posts = {post.id: post for post in result.scalars()}
+
+        found_posts = []
+        for match in matches:
+            post = posts.get(match.post_id)
+            if post is None:
+                continue
+            found_post = PostSearchResult.model_validate(post)
+            found_post.snippet = highlight(match.snippet)
+            found_posts.append(found_post)
+
+        return {
+            "cursor": cursor,
+            "next_cursor": next_cursor,
+            "posts": found_posts
+        }
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, String, UniqueConstraint
+from sqlalchemy import JSON, ForeignKey, Index, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import Text
 
@@ -25,6 +25,18 @@ class Post(Base):
         secondary="posttag",
         back_populates="posts"
     )
+    # Copy of tags as [{"id": ..., "name": ...}], so lists of posts
+    # are read without joining tags. Kept by PostTagDAO
+    tag_list: Mapped[list[dict]] = mapped_column(JSON, default=list,
+                                                 server_default="[]")
+
+    # Serve the feed query: filter by status(and author) and
+    # sort by creation time without a separate sort step
+    __table_args__ = (
+        Index("ix_post_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_post_author_status_created_at",
+              "author", "status", "created_at"),
+    )
 
 
 class Tag(Base):
@@ -48,4 +60,21 @@ class PostTag(Base):
 
     __table_args__ = (
         UniqueConstraint("post_id", "tag_id", name="uq_post_tag"),
+        # Lookup of posts by tag. Unique constraint covers the opposite way
+        Index("ix_posttag_tag_id_post_id", "tag_id", "post_id"),
+    )
+
+
+class PostCounter(Base):
+    """
+    Number of published posts matching a filter.
+    Zero author or tag id means "any", so row (0, 0)
+    counts all published posts.
+    """
+    author_id: Mapped[int] = mapped_column(default=0)
+    tag_id: Mapped[int] = mapped_column(default=0)
+    count: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    __table_args__ = (
+        UniqueConstraint("author_id", "tag_id", name="uq_post_counter"),
     )
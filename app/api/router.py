@@ -1,16 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import JSONResponse
+from typing import Literal
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from loguru import logger
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.dao import PostDAO, PostTagDAO, TagDAO
+from app.api.bulk import export_posts, import_posts, split_lines
+from app.api.cache import feed_cache, invalidate_feeds, post_cache
+from app.api.dao import PostCounterDAO, PostDAO, PostSearchDAO, PostTagDAO, TagDAO
+from app.api.search import parse_query
 from app.api.shemas import PostFullResponse, PostNotFound, SPostCreateBase, SPostCreateWithAuthor
-from app.auth.models import User
-from app.dependencies.auth_dep import get_current_user
+from app.api.utils import PydanticJSONResponse
+from app.auth.cache import principal_cache
+from app.auth.schemas import Principal
+from app.config import settings
+from app.dependencies.auth_dep import get_current_admin_user, get_current_user
 from app.dependencies.dao_dep import get_session_no_commit, get_session_with_commit
-from app.dependencies.post_dep import get_post_info
-from app.exceptions import PostAlreadyExists
+from app.dependencies.post_dep import check_feed_modified, check_post_modified, get_post_info
+from app.exceptions import InvalidCursorException, InvalidSearchQueryException, PostAlreadyExists
 
 router = APIRouter(prefix="/api", tags=["Posts"])
 
@@ -18,7 +25,8 @@ router = APIRouter(prefix="/api", tags=["Posts"])
 @router.post("/posts", summary="Add a new post with tags")
 async def add_post(
         add_data: SPostCreateBase,
-        user_data: User = Depends(get_current_user),
+        background_tasks: BackgroundTasks,
+        user_data: Principal = Depends(get_current_user),
         session: AsyncSession = Depends(get_session_with_commit)
 ):
     post_dict = add_data.model_dump()
@@ -30,6 +38,7 @@ async def add_post(
                                  values=SPostCreateWithAuthor.model_validate(post_dict))
         post_id = post.id
 
+        tag_ids = []
         if tags:
             tag_ids = await TagDAO.add_tags(session=session,
                                             tag_names=tags)
@@ -37,6 +46,13 @@ async def add_post(
                                            post_tag_pairs=[{
                                                "post_id": post_id, "tag_id": id} for id in tag_ids
                                            ])
+
+        if post.status == "published":
+            await PostCounterDAO.count_post(session=session, author_id=post.author,
+                                            tag_ids=tag_ids, delta=1)
+            await PostSearchDAO.index_posts(session=session, post_ids=[post_id])
+
+        background_tasks.add_task(invalidate_feeds, tags)
         return {"status": "success",
                 "message": f"Post with ID {post_id} has been successfully added"}
 
@@ -49,50 +65,171 @@ async def add_post(
             detail="Something went wrong while adding post")
 
 
-@router.get("/posts/{post_id}", summary="Get post's info")
+@router.post("/posts/import", summary="Add many posts from JSONL stream")
+async def import_posts_jsonl(
+        request: Request,
+        chunk_size: int = Query(
+            default=settings.BULK_CHUNK_SIZE,
+            ge=1,
+            le=1000,
+            description="Posts added at once"),
+        user_data: Principal = Depends(get_current_user),
+        session: AsyncSession = Depends(get_session_with_commit)
+):
+    """
+    Request body is JSONL: one post per line in the same format as for
+    adding a single post. Invalid posts and posts with taken titles
+    are skipped and reported by their line numbers.
+    """
+    report = await import_posts(session=session,
+                                lines=split_lines(request.stream()),
+                                author_id=user_data.id,
+                                chunk_size=chunk_size)
+    return {"status": "success", **report}
+
+
+@router.get("/posts/export", summary="Download all published posts")
+async def export_posts_stream(
+        author_id: int | None = None,
+        format: Literal["ndjson", "csv"] = Query(
+            default="ndjson",
+            description="JSON object per line or CSV table"),
+        chunk_size: int = Query(
+            default=settings.BULK_CHUNK_SIZE,
+            ge=1,
+            le=10000,
+            description="Posts fetched from database at once")
+):
+    """
+    Posts are streamed while they are read from database,
+    so export of any size takes little memory.
+    """
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_posts(author_id=author_id, format=format, chunk_size=chunk_size),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=posts.{format}"}
+    )
+
+
+@router.get("/posts/{post_id}", summary="Get post's info",
+            response_model=PostFullResponse | PostNotFound)
 async def get_post(
         post_id: int,
+        validators: dict = Depends(check_post_modified),
         post_info: PostFullResponse | PostNotFound = Depends(get_post_info)
-) -> PostFullResponse | PostNotFound:
-    return post_info
+) -> Response:
+    """
+    Answers 304 Not Modified to `If-None-Match` or `If-Modified-Since`
+    matching the current version of the post.
+    """
+    # Post is already validated, so it's encoded as is
+    return PydanticJSONResponse(post_info, headers=validators)
 
 
 @router.get("/posts", summary="Get all published posts")
 async def get_posts(
     author_id: int | None = None,
     tag: str | None = None,
+    tag_match: Literal["exact", "prefix", "substring"] = Query(
+        default="exact",
+        description="Filter posts having the tag, a tag starting with it "
+                    "or containing it. The last one is slow"),
     page: int = Query(default=1, ge=1, description="Page number"),
     page_size: int = Query(
         default=3,
         ge=3,
         le=100,
         description="Posts in a page"),
+    cursor: str | None = Query(
+        default=None,
+        description="Token `next_cursor` of the previous page. "
+                    "If given, `page` is ignored"),
+    total: Literal["exact", "cached", "none"] = Query(
+        default="exact",
+        description="How to get total numbers of posts and pages: "
+                    "count matching posts, read cached counters or skip"),
+    validators: dict = Depends(check_feed_modified),
     session: AsyncSession = Depends(get_session_no_commit)
 ):
+    """
+    Answers 304 Not Modified to `If-None-Match` or `If-Modified-Since`
+    if no posts were changed since the list was received.
+    """
     try:
-        result = await PostDAO.get_post_list(session=session, author_id=author_id,
-                                             tag=tag, page=page, page_size=page_size)
-        return result if result["posts"] else PostNotFound(
-            message="Posts not found", status="error")
+        result = await PostDAO.get_cached_post_list(session=session, author_id=author_id,
+                                                    tag=tag, page=page, page_size=page_size,
+                                                    cursor=cursor, total=total,
+                                                    tag_match=tag_match)
+        if not result["posts"]:
+            result = PostNotFound(message="Posts not found", status="error")
+        return PydanticJSONResponse(result, headers=validators)
+    except ValueError:
+        raise InvalidCursorException
     except Exception as e:
-        logger.error(f"Error while receiving posts: {e}")
+        logger.error("Error while receiving posts: {e}", e=e)
         # For consistensy there should be HTTPException here, but for learning
         # purpose i tried this
         return JSONResponse(status_code=500, content={
                             "detail": "Internal server error"})
 
 
+@router.get("/tags", summary="Get the most used tags")
+async def get_tags(
+    limit: int = Query(default=50, ge=1, le=500, description="Max number of tags"),
+    session: AsyncSession = Depends(get_session_no_commit)
+):
+    """
+    Returns tags with numbers of their published posts, the most used first
+    """
+    tags = await TagDAO.get_cached_tag_cloud(session=session, limit=limit)
+    return PydanticJSONResponse({"tags": tags})
+
+
+@router.get("/search", summary="Search published posts by words")
+async def search_posts(
+    q: str = Query(min_length=1, max_length=200,
+                   description="Words to find in title, description or content. "
+                               "The last word may be unfinished"),
+    limit: int = Query(default=10, ge=1, le=50, description="Posts in a page"),
+    cursor: str | None = Query(
+        default=None,
+        description="Token `next_cursor` of the previous page"),
+    session: AsyncSession = Depends(get_session_no_commit)
+) -> Response:
+    """
+    Returns posts containing all the words, best matches first.
+    Snippets are html with matched words in `<mark>` tags.
+    """
+    terms = parse_query(q)
+    if not terms:
+        raise InvalidSearchQueryException
+
+    try:
+        result = await PostSearchDAO.search(session=session, terms=terms,
+                                            limit=limit, cursor=cursor)
+        return PydanticJSONResponse(result)
+    except ValueError:
+        raise InvalidCursorException
+
+
 @router.delete("/posts/{post_id}", summary="Delete post")
 async def delete_post(
         post_id: int,
+        background_tasks: BackgroundTasks,
         session: AsyncSession = Depends(get_session_with_commit),
-        current_user: User = Depends(get_current_user)
+        current_user: Principal = Depends(get_current_user)
 ):
     result = await PostDAO.delete_post(session=session, post_id=post_id, user_id=current_user.id)
     if result["status"] == "error":
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail=result["message"]
                             )
+
+    # Background tasks run after commit, so no worker
+    # can cache the post again before it's deleted
+    background_tasks.add_task(post_cache.invalidate, post_id)
+    background_tasks.add_task(invalidate_feeds)
     return result
 
 
@@ -100,8 +237,9 @@ async def delete_post(
 async def change_post_status(
         post_id: int,
         new_status: str,
+        background_tasks: BackgroundTasks,
         session: AsyncSession = Depends(get_session_with_commit),
-        current_user: User = Depends(get_current_user)
+        current_user: Principal = Depends(get_current_user)
 ):
     result = await PostDAO.change_post_status(session=session, post_id=post_id,
                                               new_status=new_status, user_id=current_user.id)
@@ -109,4 +247,51 @@ async def change_post_status(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail=result["message"]
                             )
+
+    background_tasks.add_task(post_cache.invalidate, post_id)
+    background_tasks.add_task(invalidate_feeds)
     return result
+
+
+@router.delete("/posts/{post_id}/tags/{tag_name}", summary="Remove tag from post")
+async def remove_post_tag(
+        post_id: int,
+        tag_name: str,
+        background_tasks: BackgroundTasks,
+        session: AsyncSession = Depends(get_session_with_commit),
+        current_user: Principal = Depends(get_current_user)
+):
+    result = await PostTagDAO.remove_post_tag(session=session, post_id=post_id,
+                                              tag_name=tag_name, user_id=current_user.id)
+    if result["status"] == "error":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=result["message"]
+                            )
+
+    background_tasks.add_task(post_cache.invalidate, *result.pop("post_ids"))
+    background_tasks.add_task(invalidate_feeds, result.pop("tag_names"))
+    return result
+
+
+@router.delete("/tags/{tag_name}", summary="Delete tag from all posts")
+async def delete_tag(
+        tag_name: str,
+        background_tasks: BackgroundTasks,
+        session: AsyncSession = Depends(get_session_with_commit),
+        current_user: Principal = Depends(get_current_admin_user)
+):
+    result = await TagDAO.delete_tag(session=session, tag_name=tag_name)
+    if result["status"] == "error":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=result["message"]
+                            )
+
+    background_tasks.add_task(post_cache.invalidate, *result.pop("post_ids"))
+    background_tasks.add_task(invalidate_feeds, result.pop("tag_names"))
+    return result
+
+
+@router.get("/cache/stats", summary="Get statistics of caches")
+async def get_cache_stats() -> dict:
+    return {"posts": await post_cache.stats(), "feeds": await feed_cache.stats(),
+            "principals": await principal_cache.stats()}
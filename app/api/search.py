@@ -0,0 +1,180 @@
+import html
+import re
+from abc import ABC, abstractmethod
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+# Markers of matched words in snippets, they can't be in posts text
+# after html escaping
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+# Longer queries are cut
+MAX_TERMS = 8
+
+
+def parse_query(query: str) -> list[str]:
+    """
+    Splits user's query to words. Operators and quotes of search syntax
+    are dropped, so any input makes a valid query of all the words.
+    """
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+def highlight(snippet: str) -> str:
+    """
+    Escapes snippet as html and wraps matched words in <mark>
+    """
+    return (html.escape(snippet)
+            .replace(MATCH_START, "<mark>")
+            .replace(MATCH_END, "</mark>"))
+
+
+class SearchBackend(ABC):
+    """
+    Full-text index of published posts' titles, descriptions and contents.
+    Matches are ranked, lower rank is better.
+    """
+
+    @abstractmethod
+    async def index_posts(self, session: AsyncSession, post_ids: list[int]) -> None:
+        """Adds posts to index, their text is read from posts table"""
+
+    @abstractmethod
+    async def remove_posts(self, session: AsyncSession, post_ids: list[int]) -> None:
+        """Removes posts from index"""
+
+    @abstractmethod
+    async def search(self, session: AsyncSession, terms: list[str], limit: int,
+                     after: tuple[float, int] | None = None) -> list:
+        """
+        Finds posts containing all the terms, the last term may be a prefix.
+
+        Args:
+            session: Async session
+            terms: Words made by `parse_query`
+            limit: Max number of matches
+            after: Rank and id of the last match of the previous page
+
+        Returns:
+            Rows with `post_id`, `rank` and `snippet` ordered by rank and id
+        """
+
+
+class SQLiteSearch(SearchBackend):
+    """
+    FTS5 table `post_fts` with rowid equal to post's id, ranked by BM25.
+    Title matches weigh more than description and content matches.
+    """
+
+    RANK = "bm25(post_fts, 10.0, 5.0, 1.0)"
+
+    async def index_posts(self, session: AsyncSession, post_ids: list[int]) -> None:
+        if not post_ids:
+            return
+        query = text(
+            "INSERT INTO post_fts (rowid, title, description, content) "
+            "SELECT id, title, description, content FROM post WHERE id IN :post_ids"
+        ).bindparams(bindparam("post_ids", expanding=True))
+        await session.execute(query, {"post_ids": post_ids})
+
+    async def remove_posts(self, session: AsyncSession, post_ids: list[int]) -> None:
+        if not post_ids:
+            return
+        query = text("DELETE FROM post_fts WHERE rowid IN :post_ids").bindparams(
+            bindparam("post_ids", expanding=True))
+        await session.execute(query, {"post_ids": post_ids})
+
+    async def search(self, session: AsyncSession, terms: list[str], limit: int,
+                     after: tuple[float, int] | None = None) -> list:
+        # Every term is quoted, so it's matched as a word.
+        # The last one is a prefix, so unfinished words are found
+        match = " ".join(f'"{term}"' for term in terms) + "*"
+        params = {"match": match, "limit": limit,
+                  "start": MATCH_START, "end": MATCH_END}
+
+        keyset = ""
+        if after is not None:
+            keyset = (f"AND ({self.RANK} > :rank "
+                      f"OR ({self.RANK} = :rank AND rowid > :post_id)) ")
+            params.update(rank=after[0], post_id=after[1])
+
+        query = text(
+            f"SELECT rowid AS post_id, {self.RANK} AS rank, "
+            f"snippet(post_fts, -1, :start, :end, '…', 24) AS snippet "
+            f"FROM post_fts WHERE post_fts MATCH :match {keyset}"
+            f"ORDER BY {self.RANK}, rowid LIMIT :limit"
+        )
+        result = await session.execute(query, params)
+        return list(result.all())
+
+
+class PostgresSearch(SearchBackend):
+    """
+    Table `post_search` of weighted tsvectors with GIN index,
+    ranked by ts_rank_cd. Snippets are made for found posts only.
+    """
+
+    DOCUMENT = (
+        "setweight(to_tsvector(CAST(:config AS regconfig), title), 'A') || "
+        "setweight(to_tsvector(CAST(:config AS regconfig), description), 'B') || "
+        "setweight(to_tsvector(CAST(:config AS regconfig), content), 'C')"
+    )
+
+    async def index_posts(self, session: AsyncSession, post_ids: list[int]) -> None:
+        if not post_ids:
+            return
+        query = text(
+            f"INSERT INTO post_search (post_id, document) "
+            f"SELECT id, {self.DOCUMENT} FROM post WHERE id IN :post_ids "
+            f"ON CONFLICT (post_id) DO UPDATE SET document = excluded.document"
+        ).bindparams(bindparam("post_ids", expanding=True))
+        await session.execute(query, {"post_ids": post_ids,
+                                      "config": settings.SEARCH_PG_CONFIG})
+
+    async def remove_posts(self, session: AsyncSession, post_ids: list[int]) -> None:
+        if not post_ids:
+            return
+        query = text("DELETE FROM post_search WHERE post_id IN :post_ids").bindparams(
+            bindparam("post_ids", expanding=True))
+        await session.execute(query, {"post_ids": post_ids})
+
+    async def search(self, session: AsyncSession, terms: list[str], limit: int,
+                     after: tuple[float, int] | None = None) -> list:
+        tsquery = " & ".join(f"'{term}'" for term in terms) + ":*"
+        params = {"tsquery": tsquery, "limit": limit, "config": settings.SEARCH_PG_CONFIG,
+                  "options": f"StartSel={MATCH_START}, StopSel={MATCH_END}, "
+                             f"MaxWords=24, MinWords=8"}
+
+        keyset = ""
+        if after is not None:
+            keyset = ("AND (-ts_rank_cd(s.document, q) > :rank "
+                      "OR (-ts_rank_cd(s.document, q) = :rank AND s.post_id > :post_id)) ")
+            params.update(rank=after[0], post_id=after[1])
+
+        query = text(
+            f"SELECT m.post_id, m.rank, "
+            f"ts_headline(CAST(:config AS regconfig), p.content, m.q, :options) AS snippet "
+            f"FROM ("
+            f"SELECT s.post_id, -ts_rank_cd(s.document, q) AS rank, q "
+            f"FROM post_search s, to_tsquery(CAST(:config AS regconfig), :tsquery) q "
+            f"WHERE s.document @@ q {keyset}"
+            f"ORDER BY rank, s.post_id LIMIT :limit"
+            f") m JOIN post p ON p.id = m.post_id "
+            f"ORDER BY m.rank, m.post_id"
+        )
+        result = await session.execute(query, params)
+        return list(result.all())
+
+
+_backends = {"sqlite": SQLiteSearch(), "postgresql": PostgresSearch()}
+
+
+def get_search_backend(session: AsyncSession) -> SearchBackend:
+    """
+    Returns search backend of the database behind the session
+    """
+    return _backends[session.bind.dialect.name]
@@ -28,11 +28,11 @@ class TagResponse(BaseModelConfig):
     name: str
 
 
-class PostFullResponse(BaseModelConfig):
+class PostSummary(BaseModelConfig):
+    """Post without content, used by lists"""
     id: int
     author: int
     title: str
-    content: str
     description: str
     created_at: datetime
     status: str
@@ -50,6 +50,24 @@ class PostFullResponse(BaseModelConfig):
         return self.user.name if self.user else None
 
 
+class PostFullResponse(PostSummary):
+    content: str
+    updated_at: datetime
+
+
+class PostVersion(BaseModelConfig):
+    """Fields of a post which change, used to validate client's copy"""
+    status: str
+    author: int
+    updated_at: datetime
+    tags: List[TagResponse]
+
+
+class PostSearchResult(PostSummary):
+    # Html-escaped fragment of text with matched words in <mark> tags
+    snippet: str = ""
+
+
 class PostNotFound(BaseModelConfig):
     message: str
     status: str
@@ -0,0 +1,160 @@
+import base64
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+
+class PydanticJSONResponse(JSONResponse):
+    """
+    JSON response encoded by pydantic-core in one pass. Dicts, datetimes
+    and pydantic models are serialized without `jsonable_encoder` and
+    without validating models again, so endpoints return it directly.
+    """
+
+    _adapter = TypeAdapter(Any)
+
+    def render(self, content: Any) -> bytes:
+        return self._adapter.dump_json(content)
+
+
+def _encode_token(values: list) -> str:
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_token(token: str) -> list:
+    # Restore stripped base64 padding
+    raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    return json.loads(raw)
+
+
+def encode_cursor(created_at: datetime, post_id: int) -> str:
+    """
+    Makes an opaque keyset pagination token pointing to the given post.
+
+    Args:
+        created_at: Creation time of the last post on a page
+        post_id: Id of the last post on a page
+
+    Returns:
+        Url-safe token
+    """
+    return _encode_token([created_at.isoformat(), post_id])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Parses a token made by `encode_cursor`.
+
+    Args:
+        cursor: Token to parse
+
+    Returns:
+        Pair of post's creation time and id
+
+    Raises:
+        ValueError: if the token is malformed
+    """
+    try:
+        created_at, post_id = _decode_token(cursor)
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def encode_search_cursor(rank: float, post_id: int) -> str:
+    """
+    Makes pagination token of search results pointing to the given match.
+
+    Args:
+        rank: Rank of the last match on a page
+        post_id: Id of the last post on a page
+
+    Returns:
+        Url-safe token
+    """
+    return _encode_token([rank, post_id])
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, int]:
+    """
+    Parses a token made by `encode_search_cursor`.
+
+    Raises:
+        ValueError: if the token is malformed
+    """
+    try:
+        rank, post_id = _decode_token(cursor)
+        return float(rank), int(post_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def make_etag(*parts) -> str:
+    """
+    Makes weak ETag from parts identifying a version of a resource
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def validator_headers(etag: str, last_modified: datetime | None = None) -> dict:
+    """
+    Returns headers of conditional requests for a resource version.
+    Clients have to revalidate the resource on each use.
+
+    Args:
+        etag: Resource's ETag
+        last_modified (optional): Time of the last change, naive datetimes are UTC.
+                                  If None, the resource is validated by ETag only
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Cookie"
+    }
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str,
+                    last_modified: datetime | None = None) -> bool:
+    """
+    Checks whether the client already has the current version of a resource.
+    If-None-Match takes precedence over If-Modified-Since
+
+    Args:
+        request: Request with conditional headers
+        etag: Current resource's ETag
+        last_modified (optional): Time of the last change, naive datetimes are UTC.
+                                  If None, If-Modified-Since is ignored
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have no fractions of second
+    return last_modified.replace(microsecond=0) <= since
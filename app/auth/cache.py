@@ -0,0 +1,7 @@
+from app.cache.cache import create_cache
+from app.config import settings
+
+# Snapshots of authenticated users by id, so requests are authorized
+# without querying the user
+principal_cache = create_cache("principal", maxsize=settings.PRINCIPAL_CACHE_SIZE,
+                               ttl=settings.PRINCIPAL_CACHE_TTL)
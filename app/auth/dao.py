@@ -1,10 +1,120 @@
-from app.dao.base import BaseDAO
-from app.auth.models import User, Role
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+
+from app.dao.base import BaseDAO, dialect_insert
+from app.auth.cache import principal_cache
+from app.auth.models import User, Role, RevokedToken
+from app.auth.schemas import Principal
 
 
 class UsersDAO(BaseDAO):
     model = User
 
+    @classmethod
+    async def get_principal(cls, session: AsyncSession, user_id: int) -> Principal | None:
+        """
+        Returns snapshot of the user used for authorization.
+        Snapshots are cached, the role isn't loaded.
+
+        Args:
+            session: Async session
+            user_id: Id of the user
+
+        Returns:
+            Snapshot or None if user doesn't exist
+        """
+        principal = await principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+
+        query = select(User.id, User.name, User.role_id).filter_by(id=user_id)
+        result = await session.execute(query)
+        row = result.one_or_none()
+        if row is None:
+            return None
+
+        principal = Principal.model_validate(row)
+        await principal_cache.set(user_id, principal)
+        return principal
+
+    @classmethod
+    async def update(cls, session: AsyncSession,
+                     filters: BaseModel, values: BaseModel):
+        """
+        Updates users and drops their cached snapshots
+        """
+        user_ids = await cls._find_ids(session, filters)
+        rowcount = await super().update(session=session, filters=filters, values=values)
+        await principal_cache.invalidate(*user_ids)
+        return rowcount
+
+    @classmethod
+    async def delete(cls, session: AsyncSession, filters: BaseModel):
+        """
+        Deletes users and drops their cached snapshots
+        """
+        user_ids = await cls._find_ids(session, filters)
+        rowcount = await super().delete(session=session, filters=filters)
+        await principal_cache.invalidate(*user_ids)
+        return rowcount
+
+    @classmethod
+    async def _find_ids(cls, session: AsyncSession, filters: BaseModel) -> list[int]:
+        # Snapshots may be cached again before the change is committed,
+        # TTL of the cache bounds such staleness
+        filter_dict = filters.model_dump(exclude_unset=True)
+        result = await session.execute(select(User.id).filter_by(**filter_dict))
+        return list(result.scalars())
+
 
 class RoleDAO(BaseDAO):
     model = Role
+
+
+class RevokedTokenDAO(BaseDAO):
+    model = RevokedToken
+
+    @classmethod
+    async def revoke(cls, session: AsyncSession, jti: str, expires_at: datetime) -> None:
+        """
+        Adds token to revoked ones and drops expired entries.
+        Times are naive UTC.
+
+        Args:
+            session: Async session
+            jti: Id of the token
+            expires_at: Expiration time of the token
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+
+        query = (
+            dialect_insert(session, RevokedToken)
+            .values(jti=jti, expires_at=expires_at, created_at=now)
+            .on_conflict_do_nothing(index_elements=["jti"])
+        )
+        await session.execute(query)
+
+    @classmethod
+    async def find_revoked(cls, session: AsyncSession, since: datetime | None = None):
+        """
+        Returns unexpired revoked tokens.
+
+        Args:
+            session: Async session
+            since: If given, only tokens revoked since this time
+
+        Returns:
+            Rows with `jti` and `expires_at`
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        query = select(RevokedToken.jti, RevokedToken.expires_at).where(
+            RevokedToken.expires_at > now)
+        if since is not None:
+            query = query.where(RevokedToken.created_at >= since)
+
+        result = await session.execute(query)
+        return result.all()
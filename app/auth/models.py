@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import TYPE_CHECKING
-from sqlalchemy import text, ForeignKey
+from sqlalchemy import text, ForeignKey, TIMESTAMP
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.dao.database import Base, str_uniq
@@ -29,3 +30,12 @@ class User(Base):
 
     def __repr__(self):
         return f"{self.__class__.__name__}(id={self.id})"
+
+
+class RevokedToken(Base):
+    """Access token revoked before its expiration, e.g. on logout"""
+    jti: Mapped[str_uniq]
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(id={self.id}, jti={self.jti})"
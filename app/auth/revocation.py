@@ -0,0 +1,63 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dao import RevokedTokenDAO
+from app.config import settings
+
+
+class RevocationList:
+    """
+    Ids(jti) of revoked tokens which aren't expired yet. The list is
+    checked in memory, revocations made by other workers are read from
+    database at most once in `poll_interval` seconds.
+    """
+
+    # Revocations committed late or by a host with skewed clock
+    # are still read
+    OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._revoked: dict[str, datetime] = {}
+        self._polled_at = float("-inf")
+        self._synced_at: datetime | None = None
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    async def revoke(self, session: AsyncSession, jti: str, expires_at: datetime) -> None:
+        """
+        Revokes token in the current worker at once and in others
+        after the session is committed
+        """
+        self._revoked[jti] = expires_at
+        await RevokedTokenDAO.revoke(session=session, jti=jti, expires_at=expires_at)
+
+    def sync_due(self) -> bool:
+        """Whether it's time to read revocations of other workers"""
+        return time.monotonic() - self.poll_interval >= self._polled_at
+
+    async def sync(self, session: AsyncSession) -> None:
+        """
+        Reads tokens revoked since the previous sync
+        """
+        if not self.sync_due():
+            return
+        self._polled_at = time.monotonic()
+
+        utcnow = datetime.now(timezone.utc).replace(tzinfo=None)
+        since = self._synced_at - self.OVERLAP if self._synced_at else None
+        self._synced_at = utcnow
+
+        rows = await RevokedTokenDAO.find_revoked(session=session, since=since)
+        for row in rows:
+            self._revoked[row.jti] = row.expires_at
+
+        # Expired tokens are rejected anyway
+        self._revoked = {jti: expires_at for jti, expires_at in self._revoked.items()
+                         if expires_at > utcnow}
+
+
+revoked_tokens = RevocationList(poll_interval=settings.TOKEN_REVOCATION_POLL_INTERVAL)
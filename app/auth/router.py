@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 from fastapi import APIRouter, Response, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -5,7 +7,10 @@ from app.auth.dao import UsersDAO
 from app.auth.schemas import SUserAddDB, SUserAuth, SUserRegister, UserBase
 from app.dependencies.dao_dep import get_session_no_commit, get_session_with_commit
 from app.exceptions import IncorrectLoginOrPasswordException, UserAlreadyExistsException
-from app.auth.utils import authenticate_user, set_cookie
+from app.auth.revocation import revoked_tokens
+from app.auth.utils import (authenticate_user, decode_access_token, hash_password,
+                            needs_rehash, set_cookie)
+from app.dependencies.auth_dep import get_token_optional
 
 router = APIRouter(prefix='/auth', tags=['Auth'])
 
@@ -24,6 +29,7 @@ async def register_user(user_data: SUserRegister,
     # Add user to database
     user_data_dict = user_data.model_dump()
     user_data_dict.pop("confirm_passwrod", None)
+    user_data_dict["password"] = await hash_password(user_data.password)
 
     await UsersDAO.add(session=session, values=SUserAddDB(**user_data_dict))
 
@@ -34,19 +40,30 @@ async def register_user(user_data: SUserRegister,
 async def auth_user(
         response: Response,
         user_data: SUserAuth,
-        session: AsyncSession = Depends(get_session_no_commit)) -> dict:
+        session: AsyncSession = Depends(get_session_with_commit)) -> dict:
     """
-    Checks correctness of entered data and set cookie for authentication
+    Checks correctness of entered data and set cookie for authentication.
+    Password hashed with outdated cost parameters is rehashed.
     """
     user = await UsersDAO.find_one_or_none(
         session=session,
         filters=UserBase(name=user_data.name)
     )
 
-    if not user or not await authenticate_user(user=user, password=user_data.password):
+    # Unknown user is checked too, so both cases take the same time
+    user = await authenticate_user(user=user, password=user_data.password)
+    if user is None:
         raise IncorrectLoginOrPasswordException
 
-    set_cookie(response, user.id)
+    if needs_rehash(user.password):
+        await UsersDAO.update(
+            session=session,
+            filters=UserBase(name=user.name),
+            values=SUserAddDB(name=user.name,
+                              password=await hash_password(user_data.password))
+        )
+
+    set_cookie(response, user)
     return {
         "ok": True,
         "message": "Successful authorization"
@@ -54,10 +71,18 @@ async def auth_user(
 
 
 @router.post("/logout")
-async def logout(response: Response):
+async def logout(response: Response,
+                 token: str | None = Depends(get_token_optional),
+                 session: AsyncSession = Depends(get_session_with_commit)):
     """
-    Removes cookie from response
+    Removes cookie from response and revokes the token,
+    so its copies can't be used
     """
+    claims = decode_access_token(token) if token else None
+    if claims:
+        expires_at = datetime.fromtimestamp(claims["exp"], timezone.utc).replace(tzinfo=None)
+        await revoked_tokens.revoke(session=session, jti=claims["jti"], expires_at=expires_at)
+
     response.delete_cookie("user_access_token")
     return {"message": "Successfully logout"}
 
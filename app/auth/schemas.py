@@ -22,13 +22,21 @@ class SUserRegister(UserBase):
 
 
 class SUserAddDB(UserBase):
-    password: str = Field(min_length=5, max_length=50)
+    password: str = Field(description="Password's hash")
 
 
 class SUserAuth(UserBase):
     password: str = Field(min_length=5, max_length=50)
 
 
+class Principal(BaseModel):
+    """Immutable snapshot of authenticated user"""
+    id: int
+    name: str
+    role_id: int
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
 class RoleModel(BaseModel):
     id: int = Field()
     name: str = Field()
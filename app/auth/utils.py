@@ -1,15 +1,201 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from functools import partial
+
+import anyio
 from fastapi import Response
+from loguru import logger
+
+from app.config import settings
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _key_id(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()[:8]
+
+
+if settings.SECRET_KEYS:
+    _secret_keys = settings.SECRET_KEYS
+else:
+    logger.warning("SECRET_KEYS aren't set, tokens are signed by a random key")
+    _secret_keys = [secrets.token_urlsafe(32)]
+
+# Keys by ids, token's header names the key which signed it
+_keys = {_key_id(key): key.encode() for key in _secret_keys}
+_signing_key_id = _key_id(_secret_keys[0])
+
+
+def _sign(key: bytes, signing_input: str) -> bytes:
+    return hmac.new(key, signing_input.encode(), hashlib.sha256).digest()
+
+
+def create_access_token(user) -> str:
+    """
+    Makes JWT (HS256) with user's id, name and role,
+    so the user is authorized without querying database.
+
+    Args:
+        user: User's database obj or snapshot
+
+    Returns:
+        Signed token
+    """
+    now = int(time.time())
+    header = {"alg": "HS256", "typ": "JWT", "kid": _signing_key_id}
+    payload = {
+        "sub": str(user.id),
+        "name": user.name,
+        "role": user.role_id,
+        "iat": now,
+        "exp": now + settings.ACCESS_TOKEN_TTL,
+        "jti": secrets.token_hex(16)
+    }
+    signing_input = ".".join(
+        _b64encode(json.dumps(part, separators=(",", ":")).encode())
+        for part in (header, payload))
+    signature = _sign(_keys[_signing_key_id], signing_input)
+    return f"{signing_input}.{_b64encode(signature)}"
+
+
+def decode_access_token(token: str) -> dict | None:
+    """
+    Verifies signature and expiration of token made by `create_access_token`.
+    Revocation isn't checked.
+
+    Args:
+        token: Token from cookie
+
+    Returns:
+        Token's claims or None if token is invalid or expired
+    """
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = json.loads(_b64decode(header_b64))
+        key = _keys.get(header.get("kid"))
+        if header.get("alg") != "HS256" or key is None:
+            return None
+
+        signature = _sign(key, f"{header_b64}.{payload_b64}")
+        if not hmac.compare_digest(signature, _b64decode(signature_b64)):
+            return None
+
+        claims = json.loads(_b64decode(payload_b64))
+        if claims["exp"] <= time.time():
+            return None
+        return claims
+    except (ValueError, TypeError, AttributeError, KeyError):
+        return None
 
 
-def set_cookie(response: Response, user_id: int) -> None:
-    # TODO: use JTW
+def set_cookie(response: Response, user) -> None:
     response.set_cookie(
         key="user_access_token",
-        value=str(user_id),
-        httponly=True
+        value=create_access_token(user),
+        max_age=settings.ACCESS_TOKEN_TTL,
+        httponly=True,
+        samesite="lax"
     )
 
 
+# Threads hashing passwords. Hashing is slow by design, so it runs out of
+# the event loop, and the limit leaves threads to other work on bursts
+_kdf_limiter: anyio.CapacityLimiter | None = None
+
+
+def _get_kdf_limiter() -> anyio.CapacityLimiter:
+    # Created lazily inside event loop
+    global _kdf_limiter
+    if _kdf_limiter is None:
+        _kdf_limiter = anyio.CapacityLimiter(settings.PASSWORD_HASH_THREADS)
+    return _kdf_limiter
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=32)
+
+
+def hash_password_sync(password: str, salt: bytes | None = None) -> str:
+    """
+    Hashes password by scrypt with cost parameters from settings.
+    Blocks for tens of milliseconds, use `hash_password` in async code.
+
+    Args:
+        password: Password to hash
+        salt (optional): 16 bytes of salt. Random if not given,
+                         fixed salt is only for reproducible test data
+
+    Returns:
+        String `scrypt$n$r$p$salt$hash` keeping the parameters
+    """
+    n, r, p = (settings.PASSWORD_SCRYPT_N, settings.PASSWORD_SCRYPT_R,
+               settings.PASSWORD_SCRYPT_P)
+    if salt is None:
+        salt = secrets.token_bytes(16)
+    hashed = _scrypt(password, salt, n, r, p)
+    return f"scrypt${n}${r}${p}${_b64encode(salt)}${_b64encode(hashed)}"
+
+
+def verify_password_sync(password: str, hashed_password: str) -> bool:
+    """
+    Checks password against hash made by `hash_password_sync`
+    """
+    try:
+        algorithm, n, r, p, salt, hashed = hashed_password.split("$")
+        if algorithm != "scrypt":
+            return False
+        expected = _scrypt(password, _b64decode(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(expected, _b64decode(hashed))
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Checks whether password was hashed with other cost parameters
+    than the current settings
+    """
+    params = hashed_password.split("$")[1:4]
+    return params != [str(settings.PASSWORD_SCRYPT_N), str(settings.PASSWORD_SCRYPT_R),
+                      str(settings.PASSWORD_SCRYPT_P)]
+
+
+async def hash_password(password: str) -> str:
+    """Same as `hash_password_sync`, but doesn't block the event loop"""
+    return await anyio.to_thread.run_sync(
+        hash_password_sync, password, limiter=_get_kdf_limiter())
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    """Same as `verify_password_sync`, but doesn't block the event loop"""
+    return await anyio.to_thread.run_sync(
+        partial(verify_password_sync, password, hashed_password),
+        limiter=_get_kdf_limiter())
+
+
+# Hash of a random password with the current cost parameters,
+# checked when the user isn't found. Made on the first use
+_dummy_hash: str | None = None
+
+
+async def _get_dummy_hash() -> str:
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await hash_password(secrets.token_urlsafe(16))
+    return _dummy_hash
+
+
 async def authenticate_user(user, password):
     """
     Tries to authenticate given user's database obj and
@@ -23,6 +209,11 @@ async def authenticate_user(user, password):
         Given user if password is correct.
         Otherwise None
     """
-    if not user or user.password != password:
+    if not user:
+        # Unknown names are checked as long as known ones,
+        # so existing names can't be found out by response time
+        await verify_password(password, await _get_dummy_hash())
+        return None
+    if not await verify_password(password, user.password):
         return None
     return user
@@ -0,0 +1,266 @@
+import hashlib
+import hmac
+import pickle
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+import anyio
+from loguru import logger
+
+from app.cache.lru import LRUCache
+
+T = TypeVar("T")
+
+
+class SignedPickle:
+    """
+    Serializer of values kept outside of the process. Pickles are signed
+    by HMAC, the ones with wrong signature are treated as missing, so
+    whoever can write to the storage without the key can't make the app
+    unpickle their data.
+    """
+
+    SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+    def __init__(self, key: bytes):
+        self.key = key
+
+    def _sign(self, data: bytes) -> bytes:
+        return hmac.new(self.key, data, hashlib.sha256).digest()
+
+    def dumps(self, value: Any) -> bytes:
+        data = pickle.dumps(value)
+        return self._sign(data) + data
+
+    def loads(self, signed: bytes) -> Any | None:
+        signature, data = signed[:self.SIGNATURE_SIZE], signed[self.SIGNATURE_SIZE:]
+        if not hmac.compare_digest(signature, self._sign(data)):
+            logger.warning("Cached value with wrong signature is ignored")
+            return None
+        return pickle.loads(data)
+
+
+class CacheBackend(ABC):
+    """
+    Storage of cached values. Each backend instance serves
+    a single namespace, so keys of different caches don't clash.
+    """
+
+    name: str
+
+    def __init__(self, namespace: str, maxsize: int, ttl: float):
+        """
+        Args:
+            namespace: Name of the cache
+            maxsize: Max number of entries
+            ttl: Default seconds while an entry is valid
+        """
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+    @abstractmethod
+    async def get(self, key: str) -> Any | None:
+        """Returns value of the key or None if it's missing or expired"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Sets value of the key. Custom ttl overrides the default one"""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Removes given keys"""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Removes all keys of the namespace"""
+
+    async def stats(self) -> dict:
+        """Returns backend specific statistics"""
+        return {"maxsize": self.maxsize, "ttl": self.ttl}
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Cache in memory of the current process. The fastest one, but each
+    worker has its own copy, so invalidations have to be delivered
+    to other workers by `InvalidationBus`.
+    """
+
+    name = "memory"
+
+    def __init__(self, namespace: str, maxsize: int, ttl: float):
+        super().__init__(namespace, maxsize, ttl)
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Any | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        self._cache.set(key, value, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.delete(key)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+    async def stats(self) -> dict:
+        stats = self._cache.stats()
+        return {key: stats[key]
+                for key in ("size", "maxsize", "ttl", "evictions", "expirations")}
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cache in a local SQLite file shared by all workers on the host.
+    Stand-in for a networked cache, which needs no extra services.
+    Values are signed pickles(see `SignedPickle`). Queries may wait
+    for other workers' writes, so they run in a thread one at a time.
+    """
+
+    name = "sqlite"
+
+    # Expired entries are purged once per this number of writes
+    PURGE_PERIOD = 100
+
+    def __init__(self, namespace: str, maxsize: int, ttl: float, path: str,
+                 serializer: SignedPickle):
+        super().__init__(namespace, maxsize, ttl)
+        self.path = path
+        self.serializer = serializer
+        self._connection: sqlite3.Connection | None = None
+        self._limiter: anyio.CapacityLimiter | None = None
+        self._writes = 0
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # Opened lazily, so every worker process gets its own connection
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=5,
+                                               isolation_level=None,
+                                               check_same_thread=False)
+            # Cache content is disposable, durability isn't needed
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=OFF")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, "
+                "value BLOB NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))")
+        return self._connection
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        # Created lazily inside event loop. Single thread at a time
+        # uses the connection
+        if self._limiter is None:
+            self._limiter = anyio.CapacityLimiter(1)
+        return await anyio.to_thread.run_sync(partial(func, *args), limiter=self._limiter)
+
+    async def get(self, key: str) -> Any | None:
+        row = await self._run(self._get, key)
+        return self.serializer.loads(row[0]) if row else None
+
+    async def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        await self._run(self._set, key, self.serializer.dumps(value), ttl)
+
+    async def delete(self, *keys: str) -> None:
+        await self._run(self._delete, keys)
+
+    async def clear(self) -> None:
+        await self._run(self._clear)
+
+    async def stats(self) -> dict:
+        size = await self._run(self._size)
+        return {"size": size, **await super().stats()}
+
+    def _get(self, key: str) -> tuple | None:
+        return self.connection.execute(
+            "SELECT value FROM cache "
+            "WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (self.namespace, key, time.time())).fetchone()
+
+    def _set(self, key: str, value: bytes, ttl: float) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) "
+            "VALUES (?, ?, ?, ?)",
+            (self.namespace, key, value, time.time() + ttl))
+
+        self._writes += 1
+        if self._writes % self.PURGE_PERIOD == 0:
+            self._purge()
+
+    def _delete(self, keys: tuple[str, ...]) -> None:
+        self.connection.executemany(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?",
+            [(self.namespace, key) for key in keys])
+
+    def _clear(self) -> None:
+        self.connection.execute("DELETE FROM cache WHERE namespace = ?",
+                                (self.namespace,))
+
+    def _purge(self) -> None:
+        """
+        Removes expired entries and the ones expiring soonest above maxsize
+        """
+        self.connection.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, time.time()))
+        self.connection.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key IN ("
+            "SELECT key FROM cache WHERE namespace = ? "
+            "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.maxsize))
+
+    def _size(self) -> int:
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM cache WHERE namespace = ?",
+            (self.namespace,)).fetchone()[0]
+
+
+class RedisBackend(CacheBackend):
+    """
+    Cache in Redis shared by all workers and hosts.
+    Requires `redis` package(`redis` extra). Values are signed
+    pickles(see `SignedPickle`).
+    """
+
+    name = "redis"
+
+    def __init__(self, namespace: str, maxsize: int, ttl: float, url: str,
+                 serializer: SignedPickle):
+        super().__init__(namespace, maxsize, ttl)
+        self.serializer = serializer
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "Redis cache backend requires 'redis' package") from e
+
+        # Size is limited by Redis eviction policy, not by maxsize
+        self._redis = redis.from_url(url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Any | None:
+        value = await self._redis.get(self._key(key))
+        return self.serializer.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        await self._redis.set(self._key(key), self.serializer.dumps(value),
+                              px=int(ttl * 1000))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._redis.delete(*(self._key(key) for key in keys))
+
+    async def clear(self) -> None:
+        async for key in self._redis.scan_iter(match=self._key("*")):
+            await self._redis.delete(key)
@@ -0,0 +1,114 @@
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from functools import partial
+from typing import Callable, TypeVar
+
+import anyio
+
+T = TypeVar("T")
+
+
+class InvalidationBus(ABC):
+    """
+    Delivers invalidated keys of a cache between worker processes.
+    Each worker publishes keys it invalidates and polls keys
+    invalidated by others.
+    """
+
+    def __init__(self, channel: str):
+        """
+        Args:
+            channel: Name of the cache whose keys are delivered
+        """
+        self.channel = channel
+
+    @abstractmethod
+    async def publish(self, *keys: str) -> None:
+        """Sends invalidated keys to all workers"""
+
+    @abstractmethod
+    async def poll(self) -> list[str]:
+        """Returns keys invalidated since the previous poll"""
+
+
+class LocalBus(InvalidationBus):
+    """
+    Bus of a single process or of a shared cache backend:
+    there are no other copies of cache to notify.
+    """
+
+    async def publish(self, *keys: str) -> None:
+        pass
+
+    async def poll(self) -> list[str]:
+        return []
+
+
+class SQLiteBus(InvalidationBus):
+    """
+    Bus in a local SQLite file shared by all workers on the host.
+    Messages are kept for `RETENTION` seconds, so a worker which
+    polls less often may miss invalidations, but entries still
+    expire by ttl. Queries may wait for other workers' writes,
+    so they run in a thread one at a time.
+    """
+
+    RETENTION = 600
+
+    def __init__(self, channel: str, path: str):
+        super().__init__(channel)
+        self.path = path
+        self._connection: sqlite3.Connection | None = None
+        self._limiter: anyio.CapacityLimiter | None = None
+        self._last_id = 0
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # Opened lazily, so every worker process gets its own connection
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=5,
+                                               isolation_level=None,
+                                               check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=OFF")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS invalidation ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "channel TEXT NOT NULL, key TEXT NOT NULL, "
+                "created_at REAL NOT NULL)")
+
+            # Skip messages sent before the worker started
+            self._last_id = self._connection.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM invalidation").fetchone()[0]
+        return self._connection
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        # Created lazily inside event loop. Single thread at a time
+        # uses the connection
+        if self._limiter is None:
+            self._limiter = anyio.CapacityLimiter(1)
+        return await anyio.to_thread.run_sync(partial(func, *args), limiter=self._limiter)
+
+    async def publish(self, *keys: str) -> None:
+        await self._run(self._publish, keys)
+
+    async def poll(self) -> list[str]:
+        return await self._run(self._poll)
+
+    def _publish(self, keys: tuple[str, ...]) -> None:
+        now = time.time()
+        self.connection.executemany(
+            "INSERT INTO invalidation (channel, key, created_at) VALUES (?, ?, ?)",
+            [(self.channel, key, now) for key in keys])
+        self.connection.execute(
+            "DELETE FROM invalidation WHERE created_at < ?",
+            (now - self.RETENTION,))
+
+    def _poll(self) -> list[str]:
+        rows = self.connection.execute(
+            "SELECT id, key FROM invalidation WHERE id > ? AND channel = ? "
+            "ORDER BY id", (self._last_id, self.channel)).fetchall()
+        if rows:
+            self._last_id = rows[-1][0]
+        return [key for _, key in rows]
@@ -0,0 +1,128 @@
+import secrets
+import time
+from typing import Any, Hashable
+
+from loguru import logger
+
+from app.cache.backends import CacheBackend, MemoryBackend, RedisBackend, SignedPickle, SQLiteBackend
+from app.cache.bus import InvalidationBus, LocalBus, SQLiteBus
+from app.config import settings
+
+
+class Cache:
+    """
+    Cache used by the app. Values are kept by the backend, invalidations
+    are delivered to other workers by the bus.
+    """
+
+    def __init__(self, backend: CacheBackend, bus: InvalidationBus,
+                 poll_interval: float):
+        """
+        Args:
+            backend: Storage of values
+            bus: Delivery of invalidations between workers
+            poll_interval: Min seconds between polls of the bus
+        """
+        self.backend = backend
+        self.bus = bus
+        self.poll_interval = poll_interval
+        self._polled_at = 0.0
+
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: Hashable) -> Any | None:
+        """
+        Returns value of the key or None if it's missing
+        """
+        await self._sync()
+        value = await self.backend.get(str(key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        await self.backend.set(str(key), value, ttl)
+
+    async def invalidate(self, *keys: Hashable) -> None:
+        """
+        Removes keys from the cache of all workers
+        """
+        names = [str(key) for key in keys]
+        await self.backend.delete(*names)
+        await self.bus.publish(*names)
+
+    async def clear(self) -> None:
+        """
+        Removes all keys from the cache of the current worker
+        """
+        await self.backend.clear()
+
+    async def _sync(self) -> None:
+        """
+        Applies invalidations made by other workers
+        """
+        now = time.monotonic()
+        if now - self._polled_at < self.poll_interval:
+            return
+
+        self._polled_at = now
+        keys = await self.bus.poll()
+        if keys:
+            await self.backend.delete(*keys)
+
+    async def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            **await self.backend.stats(),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+_serializer: SignedPickle | None = None
+
+
+def _get_serializer() -> SignedPickle:
+    # Made on the first shared cache, so the warning isn't shown
+    # for memory backend
+    global _serializer
+    if _serializer is None:
+        key = settings.CACHE_SECRET_KEY
+        if not key:
+            logger.warning("CACHE_SECRET_KEY isn't set, cached values are signed "
+                           "by a random key and aren't shared by workers")
+            key = secrets.token_urlsafe(32)
+        _serializer = SignedPickle(key.encode())
+    return _serializer
+
+
+def create_cache(namespace: str, maxsize: int, ttl: float) -> Cache:
+    """
+    Creates cache with backend and bus chosen in settings
+
+    Args:
+        namespace: Name of the cache, must be unique
+        maxsize: Max number of entries
+        ttl: Default seconds while an entry is valid
+    """
+    if settings.CACHE_BACKEND == "sqlite":
+        backend = SQLiteBackend(namespace, maxsize, ttl,
+                                path=settings.CACHE_SQLITE_PATH,
+                                serializer=_get_serializer())
+    elif settings.CACHE_BACKEND == "redis":
+        backend = RedisBackend(namespace, maxsize, ttl,
+                               url=settings.CACHE_REDIS_URL,
+                               serializer=_get_serializer())
+    else:
+        backend = MemoryBackend(namespace, maxsize, ttl)
+
+    # Shared backends have no copies in other workers
+    if backend.name == "memory" and settings.CACHE_BUS == "sqlite":
+        bus = SQLiteBus(namespace, path=settings.CACHE_SQLITE_PATH)
+    else:
+        bus = LocalBus(namespace)
+
+    return Cache(backend, bus, poll_interval=settings.CACHE_BUS_POLL_INTERVAL)
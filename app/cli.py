@@ -0,0 +1,129 @@
+"""
+Command line tools of the blog.
+
+Usage:
+    python -m app.cli --help
+"""
+import argparse
+import asyncio
+import json
+import sys
+from contextlib import nullcontext
+from typing import AsyncIterator, BinaryIO
+
+from app.api.bulk import export_posts, import_posts
+from app.auth.dao import UsersDAO
+from app.config import settings
+from app.dao.database import async_session_maker
+from app.monitoring.logs import setup_logging
+from app.seed import seed_database
+
+
+async def read_lines(file: BinaryIO) -> AsyncIterator[bytes]:
+    for line in file:
+        yield line
+
+
+async def import_posts_command(args: argparse.Namespace) -> int:
+    async with async_session_maker() as session:
+        author = await UsersDAO.find_one_or_none_by_id(session=session,
+                                                       data_id=args.author_id)
+        if not author:
+            print(f"User with ID {args.author_id} not found", file=sys.stderr)
+            return 1
+
+        # Standard input isn't closed, it's not opened here
+        opened = nullcontext(sys.stdin.buffer) if args.file == "-" else open(args.file, "rb")
+        with opened as file:
+            report = await import_posts(session=session,
+                                        lines=read_lines(file),
+                                        author_id=args.author_id,
+                                        chunk_size=args.chunk_size)
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+async def export_posts_command(args: argparse.Namespace) -> int:
+    # Standard output isn't closed, it's not opened here
+    opened = (nullcontext(sys.stdout) if args.output == "-"
+              else open(args.output, "w", newline="", encoding="utf-8"))
+    with opened as file:
+        async for chunk in export_posts(author_id=args.author_id, format=args.format,
+                                        chunk_size=args.chunk_size):
+            file.write(chunk)
+    return 0
+
+
+async def seed_command(args: argparse.Namespace) -> int:
+    async with async_session_maker() as session:
+        report = await seed_database(session=session, posts=args.posts, tags=args.tags,
+                                     users=args.users, tags_per_post=args.tags_per_post,
+                                     zipf_exponent=args.zipf_exponent,
+                                     drafts_share=args.drafts_share,
+                                     content_size=args.content_size,
+                                     search_index=args.search_index,
+                                     seed=args.seed, batch_size=args.batch_size)
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli",
+                                     description="Blog command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser(
+        "import-posts", help="Add posts from JSONL file, one post per line")
+    import_parser.add_argument("file", help="Path to JSONL file, '-' for stdin")
+    import_parser.add_argument("--author-id", type=int, required=True,
+                               help="Author of imported posts")
+    import_parser.add_argument("--chunk-size", type=int,
+                               default=settings.BULK_CHUNK_SIZE,
+                               help="Posts added at once")
+    import_parser.set_defaults(handler=import_posts_command)
+
+    export_parser = subparsers.add_parser(
+        "export-posts", help="Write all published posts as NDJSON or CSV")
+    export_parser.add_argument("--output", "-o", default="-",
+                               help="Path to output file, '-' for stdout")
+    export_parser.add_argument("--format", choices=["ndjson", "csv"],
+                               default="ndjson")
+    export_parser.add_argument("--author-id", type=int,
+                               help="Export only posts of this author")
+    export_parser.add_argument("--chunk-size", type=int,
+                               default=settings.BULK_CHUNK_SIZE,
+                               help="Posts fetched from database at once")
+    export_parser.set_defaults(handler=export_posts_command)
+
+    seed_parser = subparsers.add_parser(
+        "seed", help="Add generated users, tags and posts for benchmarks. "
+                     "The same seed makes the same data")
+    seed_parser.add_argument("--posts", type=int, default=10000)
+    seed_parser.add_argument("--tags", type=int, default=1000)
+    seed_parser.add_argument("--users", type=int, default=100)
+    seed_parser.add_argument("--tags-per-post", type=int, default=3,
+                             help="Max number of tags of a post")
+    seed_parser.add_argument("--zipf-exponent", type=float, default=1.1,
+                             help="Skew of tags popularity and authors activity, 0 - uniform")
+    seed_parser.add_argument("--drafts-share", type=float, default=0.1,
+                             help="Part of posts which are drafts")
+    seed_parser.add_argument("--content-size", type=int, default=2000,
+                             help="Median length of post's content in characters")
+    seed_parser.add_argument("--no-search-index", dest="search_index",
+                             action="store_false",
+                             help="Don't add posts to full-text search index")
+    seed_parser.add_argument("--seed", type=int, default=0,
+                             help="Seed of random generator")
+    seed_parser.add_argument("--batch-size", type=int, default=10000,
+                             help="Rows inserted at once")
+    seed_parser.set_defaults(handler=seed_command)
+
+    args = parser.parse_args(argv)
+    setup_logging()
+    return asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import os
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,6 +7,117 @@ class Settings(BaseSettings):
     BASE_DIR: str = os.path.abspath(
         os.path.join(os.path.dirname(__file__), '..'))
     DB_URL: str = f"sqlite+aiosqlite:///{BASE_DIR}/data/db.sqlite3"
+    # Read-only replicas of database used by turns for reads. Replica which
+    # fails to connect isn't used for cooldown seconds. After a write,
+    # reads of the client go to primary for sticky seconds, so the client
+    # sees own changes despite replication lag
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_COOLDOWN: float = 30
+    DB_REPLICA_STICKY_SECONDS: int = 5
+
+    # Connections pool: kept connections, extra connections on peaks,
+    # seconds to wait for a free connection, seconds after which
+    # connection is reopened(-1 - never) and check of connection before use
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+
+    # Logging: min level of messages, JSON lines instead of text and
+    # writing by a background thread, so requests don't wait for output.
+    # Frequent messages(e.g. every fetched page) are sampled: only
+    # this part of them is logged
+    LOG_LEVEL: Literal["TRACE", "DEBUG", "INFO", "SUCCESS",
+                       "WARNING", "ERROR", "CRITICAL"] = "INFO"
+    LOG_JSON: bool = False
+    LOG_ENQUEUE: bool = True
+    LOG_SAMPLE_RATE: float = 1.0
+
+    # Statements slower than this number of milliseconds are logged
+    # with their query plan(-1 - never)
+    DB_SLOW_QUERY_MS: float = 200
+    # Log parameters of slow statements too. Values of parameters named
+    # like passwords or tokens are hidden, long values are cut
+    DB_SLOW_QUERY_PARAMETERS: bool = False
+    # Add Server-Timing header with number and time of SQL statements
+    # of the request and of every DAO method it called. It shows
+    # internals to clients, so it may be turned off in production
+    SERVER_TIMING: bool = True
+
+    # Pragmas of every SQLite connection. WAL lets readers work while
+    # a writer commits, NORMAL syncs to disk on checkpoints only.
+    # Busy timeout is in milliseconds, cache size in KiB if negative,
+    # mmap size in bytes
+    SQLITE_JOURNAL_MODE: Literal["WAL", "DELETE", "TRUNCATE", "MEMORY"] = "WAL"
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL"] = "NORMAL"
+    SQLITE_BUSY_TIMEOUT: int = 5000
+    SQLITE_CACHE_SIZE: int = -16000
+    SQLITE_MMAP_SIZE: int = 128 * 1024 * 1024
+    SQLITE_TEMP_STORE: Literal["DEFAULT", "FILE", "MEMORY"] = "MEMORY"
+
+    # Keys signing access tokens. The first key signs new tokens, the others
+    # only verify tokens signed before rotation. If empty, a random key is
+    # made on start, so tokens don't survive restarts and aren't shared
+    # by workers
+    SECRET_KEYS: list[str] = []
+    # Seconds while access token is valid
+    ACCESS_TOKEN_TTL: int = 86400
+    # Min seconds between reads of new revoked tokens from database
+    TOKEN_REVOCATION_POLL_INTERVAL: float = 1
+
+    # Cost of password hashing by scrypt: CPU/memory cost(power of 2),
+    # block size and parallelization. Memory per hash is 128 * N * R bytes.
+    # Passwords hashed with other parameters are rehashed on login
+    PASSWORD_SCRYPT_N: int = 2 ** 14
+    PASSWORD_SCRYPT_R: int = 8
+    PASSWORD_SCRYPT_P: int = 1
+    # Max threads hashing passwords at once in a worker
+    PASSWORD_HASH_THREADS: int = 2
+
+    # Number of posts processed by a single query during bulk import/export
+    BULK_CHUNK_SIZE: int = 500
+
+    # Storage of caches:
+    #   memory - in worker's memory;
+    #   sqlite - in file shared by workers on the host;
+    #   redis - in Redis server, requires `redis` package
+    CACHE_BACKEND: Literal["memory", "sqlite", "redis"] = "memory"
+    CACHE_SQLITE_PATH: str = f"{BASE_DIR}/data/cache.sqlite3"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    # Key signing values of sqlite and redis caches, must be the same
+    # in all workers. If empty, a random key is made on start, so
+    # workers don't see values cached by others
+    CACHE_SECRET_KEY: str = ""
+    # Delivery of invalidations to other workers for memory backend.
+    # Use sqlite when running several workers
+    CACHE_BUS: Literal["none", "sqlite"] = "none"
+    CACHE_BUS_POLL_INTERVAL: float = 1
+
+    # Text search configuration(language) of Postgres full-text search
+    SEARCH_PG_CONFIG: str = "english"
+
+    # Cache of published posts: max number of posts and seconds to keep them
+    POST_CACHE_SIZE: int = 1024
+    POST_CACHE_TTL: float = 60
+
+    # Cache of posts list pages by filters
+    FEED_CACHE_SIZE: int = 512
+    FEED_CACHE_TTL: float = 30
+    # Generations of feed filters. Evicted generation just makes
+    # pages of its filter outdated
+    GENERATION_CACHE_SIZE: int = 10000
+    GENERATION_CACHE_TTL: float = 86400
+
+    # Cache of authenticated users. Without a bus other workers may keep
+    # outdated user for TTL seconds
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: float = 30
+
+    model_config = SettingsConfigDict(
+        env_file=os.path.join(os.path.dirname(__file__), '..', '.env'),
+        extra="ignore"
+    )
 
 
 settings = Settings()
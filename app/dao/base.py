@@ -3,17 +3,34 @@ from typing import List, TypeVar, Generic, Type
 from pydantic import BaseModel
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.future import select
-from sqlalchemy import update as sqlalchemy_update, delete as sqlalchemy_delete
+from sqlalchemy import Table, update as sqlalchemy_update, delete as sqlalchemy_delete
+from sqlalchemy.dialects import postgresql, sqlite
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.monitoring.profiler import instrument_dao
 from .database import Base
 
 T = TypeVar("T", bound=Base)
 
 
+def dialect_insert(session: AsyncSession, model: Type[Base] | Table):
+    """
+    Makes INSERT statement for given model, which supports
+    ON CONFLICT clauses of the database behind the session
+    """
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
 class BaseDAO(Generic[T]):
     model: Type[T]
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Count SQL statements of every DAO method in request profile
+        instrument_dao(cls)
+
     @classmethod
     async def find_one_or_none_by_id(cls, session: AsyncSession, data_id: int):
         """
@@ -24,15 +41,13 @@ class BaseDAO(Generic[T]):
             result = await session.execute(query)
             record = result.scalar_one_or_none()
 
-            log_message = f"Record {
-                cls.model.__name__} with ID {data_id} {
-                'found' if record else 'not found'}."
-            logger.info(log_message)
-
+            logger.debug("Record {model} with ID {data_id} {status}",
+                         model=cls.model.__name__, data_id=data_id,
+                         status="found" if record else "not found")
             return record
         except SQLAlchemyError as e:
-            logger.error(
-                f"Internal error while finding record with ID {data_id}: {e}")
+            logger.error("Internal error while finding record {model} with ID {data_id}: {e}",
+                         model=cls.model.__name__, data_id=data_id, e=e)
             raise
 
     @classmethod
@@ -41,23 +56,19 @@ class BaseDAO(Generic[T]):
         Finds a record by given filters
         """
         filter_dict = filters.model_dump(exclude_unset=True)
-        logger.info(
-            f"Searching a record {
-                cls.model.__name__} using filters: {filter_dict}")
 
         try:
             query = select(cls.model).filter_by(**filter_dict)
             result = await session.execute(query)
             record = result.scalar_one_or_none()
 
-            log_message = f"Record {
-                'found' if record else 'not found'} using filters: {filter_dict}"
-            logger.info(log_message)
-
+            logger.debug("Record {model} {status} using filters: {filters}",
+                         model=cls.model.__name__, filters=filter_dict,
+                         status="found" if record else "not found")
             return record
         except SQLAlchemyError as e:
-            logger.error(
-                f"Internal error while finding record with filters {filter_dict}: {e}")
+            logger.error("Internal error while finding record {model} with filters {filters}: {e}",
+                         model=cls.model.__name__, filters=filter_dict, e=e)
             raise
 
     @classmethod
@@ -67,20 +78,19 @@ class BaseDAO(Generic[T]):
         Finds all records with optional filters
         """
         filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
-        logger.info(
-            f"Searching all record {
-                cls.model.__name__} with filters: {filter_dict}")
 
         try:
             query = select(cls.model).filter_by(**filter_dict)
             result = await session.execute(query)
             records = result.scalars().all()
 
-            logger.info(f"Found {len(records)} records.")
+            logger.debug("Found {count} records {model} using filters: {filters}",
+                         count=len(records), model=cls.model.__name__,
+                         filters=filter_dict)
             return records
         except SQLAlchemyError as e:
-            logger.error(
-                f"Internal error while finding all record with filters {filter_dict}: {e}")
+            logger.error("Internal error while finding records {model} with filters {filters}: {e}",
+                         model=cls.model.__name__, filters=filter_dict, e=e)
             raise
 
     @classmethod
@@ -89,19 +99,18 @@ class BaseDAO(Generic[T]):
         Adds a new record with given values
         """
         values_dict = values.model_dump(exclude_unset=True)
-        logger.info(
-            f"Adding a record {
-                cls.model.__name__} with values: {values_dict}")
         try:
             new_instance = cls.model(**values_dict)
             session.add(new_instance)
             await session.flush()
 
-            logger.info(f"Record {cls.model.__name__} is successfully added.")
+            logger.debug("Record {model} with ID {id} is successfully added",
+                         model=cls.model.__name__, id=new_instance.id)
             return new_instance
         except SQLAlchemyError as e:
-            logger.error(
-                f"Internal error while adding a record with values {values_dict}: {e}")
+            # Values aren't logged, they may contain passwords
+            logger.error("Internal error while adding a record {model}: {e}",
+                         model=cls.model.__name__, e=e)
             raise
 
     @classmethod
@@ -111,21 +120,17 @@ class BaseDAO(Generic[T]):
         """
         values_list = [item.model_dump(exclude_unset=True)
                        for item in instances]
-        logger.info(
-            f"Adding {
-                len(values_list)} records {
-                cls.model.__name__}. ")
         try:
             new_instances = [cls.model(**values) for values in values_list]
             session.add_all(new_instances)
             await session.flush()
 
-            logger.info(f"Successfully added {len(new_instances)} записей.")
+            logger.debug("Successfully added {count} records {model}",
+                         count=len(new_instances), model=cls.model.__name__)
             return new_instances
         except SQLAlchemyError as e:
-            logger.error(
-                f"Internal error while adding {
-                    len(values_list)} records: {e}")
+            logger.error("Internal error while adding {count} records {model}: {e}",
+                         count=len(values_list), model=cls.model.__name__, e=e)
             raise
 
     @classmethod
@@ -137,8 +142,6 @@ class BaseDAO(Generic[T]):
         """
         filter_dict = filters.model_dump(exclude_unset=True)
         values_dict = values.model_dump(exclude_unset=True)
-        logger.info(
-            f"Updating records {cls.model.__name__} with filters: {filter_dict} with values: {values_dict}")
 
         try:
             query = (
@@ -150,10 +153,13 @@ class BaseDAO(Generic[T]):
             result = await session.execute(query)
             await session.flush()
 
-            logger.info(f"Updated {result.rowcount} records.")
+            logger.debug("Updated {count} records {model} using filters: {filters}",
+                         count=result.rowcount, model=cls.model.__name__,
+                         filters=filter_dict)
             return result.rowcount
         except SQLAlchemyError as e:
-            logger.error(f"Internal error while updating records: {e}")
+            logger.error("Internal error while updating records {model} with filters {filters}: {e}",
+                         model=cls.model.__name__, filters=filter_dict, e=e)
             raise
 
     @classmethod
@@ -162,9 +168,6 @@ class BaseDAO(Generic[T]):
         Deletes records using filters
         """
         filter_dict = filters.model_dump(exclude_unset=True)
-        logger.info(
-            f"Deleting records {
-                cls.model.__name__} with filter: {filter_dict}")
 
         if not filter_dict:
             msg = "At least 1 filter must be provided for deleting"
@@ -175,8 +178,14 @@ class BaseDAO(Generic[T]):
             result = await session.execute(query)
             await session.flush()
 
-            logger.info(f"Deleted {result.rowcount} records.")
+            logger.debug("Deleted {count} records {model} using filters: {filters}",
+                         count=result.rowcount, model=cls.model.__name__,
+                         filters=filter_dict)
             return result.rowcount
         except SQLAlchemyError as e:
-            logger.error(f"Internal error while deleting records: {e}")
+            logger.error("Internal error while deleting records {model} with filters {filters}: {e}",
+                         model=cls.model.__name__, filters=filter_dict, e=e)
             raise
+
+
+instrument_dao(BaseDAO)
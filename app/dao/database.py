@@ -3,16 +3,91 @@ from decimal import Decimal
 
 from typing import Annotated
 from datetime import datetime
-from sqlalchemy import func, TIMESTAMP, Integer, inspect
+from functools import partial
+from sqlalchemy import event, func, make_url, TIMESTAMP, Integer, inspect
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, declared_attr
 from sqlalchemy.ext.asyncio import (AsyncAttrs, async_sessionmaker,
-                                    create_async_engine, AsyncSession)
+                                    create_async_engine, AsyncEngine, AsyncSession)
 
-from app.config import database_url
+from app.config import database_url, settings
+from app.monitoring.metrics import TimedQueuePool, track_pool
+from app.monitoring.profiler import instrument_engine
 
-engine = create_async_engine(url=database_url)
+def set_sqlite_pragmas(dbapi_connection, connection_record, read_only: bool = False):
+    """
+    Applies SQLite pragmas from settings to every new connection
+    """
+    cursor = dbapi_connection.cursor()
+    # Journal mode is kept in the file, so changing it is a write
+    if not read_only:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT}")
+    cursor.execute(f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}")
+    cursor.close()
+
+
+def read_only_url(url: str) -> str:
+    """
+    Makes SQLite URL open the file read-only. Otherwise a missing file
+    is created empty and reads would silently find nothing
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or not parsed.database or parsed.database == ":memory:":
+        return url
+    database = parsed.database
+    if not database.startswith("file:"):
+        database = f"file:{database}"
+    parsed = parsed.set(database=database).update_query_dict({"mode": "ro", "uri": "true"})
+    return parsed.render_as_string(hide_password=False)
+
+
+def make_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    """
+    Creates engine with pool and SQLite settings.
+    SQLite file of read-only engine must exist, it's never created
+    """
+    if read_only:
+        url = read_only_url(url)
+    engine = create_async_engine(
+        url=url,
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING
+    )
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect",
+                     partial(set_sqlite_pragmas, read_only=read_only))
+    instrument_engine(engine)
+    track_pool(engine)
+    return engine
+
+
+engine = make_engine(database_url)
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession,
                                          expire_on_commit=False)
+# Read-only copies of database, see app/dao/replicas.py
+replica_session_makers = [
+    async_sessionmaker(make_engine(url, read_only=True), class_=AsyncSession,
+                       expire_on_commit=False)
+    for url in settings.DB_REPLICA_URLS
+]
+
+# SQLite keeps server side CURRENT_TIMESTAMP as 'YYYY-MM-DD HH:MM:SS',
+# while datetimes are bound with microseconds by default. Such strings never
+# compare equal, so datetimes are bound in the format of server side values
+Timestamp = TIMESTAMP().with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d "
+                       "%(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite")
+
 int_uniq = Annotated[int,
                      mapped_column(primary_key=True, autoincrement=True)]
 str_uniq = Annotated[str,
@@ -26,9 +101,9 @@ class Base(AsyncAttrs, DeclarativeBase):
     id: Mapped[int] = mapped_column(
         Integer, primary_key=True, autoincrement=True)
 
-    created_at: Mapped[datetime] = mapped_column(TIMESTAMP,
+    created_at: Mapped[datetime] = mapped_column(Timestamp,
                                                  server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP,
+    updated_at: Mapped[datetime] = mapped_column(Timestamp,
                                                  server_default=func.now(),
                                                  onupdate=func.now())
 
@@ -0,0 +1,60 @@
+import itertools
+import time
+
+from loguru import logger
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.dao.database import async_session_maker, replica_session_makers
+
+
+class ReplicaSet:
+    """
+    Session makers of read replicas chosen by round-robin.
+    Replica which failed is skipped for `cooldown` seconds.
+    """
+
+    def __init__(self, session_makers: list[async_sessionmaker], cooldown: float):
+        self.session_makers = session_makers
+        self.cooldown = cooldown
+        self._turns = itertools.count()
+        self._failed_until = [0.0] * len(session_makers)
+
+    def __bool__(self) -> bool:
+        return bool(self.session_makers)
+
+    def next(self) -> int | None:
+        """
+        Returns index of the next healthy replica or None if there are none
+        """
+        now = time.monotonic()
+        for _ in range(len(self.session_makers)):
+            index = next(self._turns) % len(self.session_makers)
+            if self._failed_until[index] <= now:
+                return index
+        return None
+
+    def mark_failed(self, index: int) -> None:
+        self._failed_until[index] = time.monotonic() + self.cooldown
+
+
+replicas = ReplicaSet(replica_session_makers, cooldown=settings.DB_REPLICA_COOLDOWN)
+
+
+async def open_read_session() -> AsyncSession:
+    """
+    Opens session on a healthy replica. If all replicas fail
+    to connect, session is opened on primary.
+    """
+    while (index := replicas.next()) is not None:
+        session = replicas.session_makers[index]()
+        try:
+            # Connect now, so failure is noticed before the session is used
+            await session.connection()
+            return session
+        except (DBAPIError, OSError) as e:
+            await session.close()
+            logger.warning("Replica {index} is unavailable: {e}", index=index, e=e)
+            replicas.mark_failed(index)
+    return async_session_maker()
@@ -2,9 +2,12 @@ from fastapi import Request, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dao import UsersDAO
+from app.auth.revocation import revoked_tokens
+from app.auth.utils import decode_access_token
+from app.dao.database import async_session_maker
 from app.dependencies.dao_dep import get_session_no_commit
 from app.exceptions import CookieNotFound, ForbiddenException, UserNotFoundException
-from app.auth.models import User
+from app.auth.schemas import Principal
 
 
 async def get_token_optional(request: Request) -> str | None:
@@ -26,30 +29,49 @@ async def get_access_token(request: Request) -> str:
 
 
 async def get_current_user_optional(
-        token: str | None = Depends(get_token_optional),
-        session: AsyncSession = Depends(get_session_no_commit)
-) -> User | None:
+        token: str | None = Depends(get_token_optional)
+) -> Principal | None:
     """
-    Returns current user ORM object if user is logged in.
+    Returns snapshot of current user if user is logged in.
     Otherwise returns None.
+    The user is taken from the signed token, so database isn't queried
+    except for rare reads of revoked tokens.
     """
     if not token:
         return None
 
-    user_id = int(token)
-    user = await UsersDAO.find_one_or_none_by_id(session=session, data_id=user_id)
-    return user
+    claims = decode_access_token(token)
+    if claims is None:
+        return None
+
+    # Session is opened only when revocations are due. They are read
+    # from primary, so they aren't delayed by replication lag
+    if revoked_tokens.sync_due():
+        async with async_session_maker() as session:
+            await revoked_tokens.sync(session)
+    if revoked_tokens.is_revoked(claims["jti"]):
+        return None
 
+    return Principal(id=int(claims["sub"]), name=claims["name"], role_id=claims["role"])
 
-async def get_current_user(user: User | None = Depends(get_current_user_optional)) -> User:
-    """Returns current user ORM object."""
+
+async def get_current_user(user: Principal | None = Depends(get_current_user_optional)) -> Principal:
+    """Returns snapshot of current user."""
     if not user:
         raise UserNotFoundException
     return user
 
 
-async def get_current_admin_user(cur_user: User = Depends(get_current_user)):
-    """Checks whether current user have admin permissions and returns it"""
-    if cur_user.role_id in [3, 4]:
-        return cur_user
+async def get_current_admin_user(
+        cur_user: Principal = Depends(get_current_user),
+        session: AsyncSession = Depends(get_session_no_commit)
+) -> Principal:
+    """
+    Checks whether current user have admin permissions and returns it.
+    Role is checked by the user's record, so a revoked role takes effect
+    before tokens expire.
+    """
+    user = await UsersDAO.get_principal(session=session, user_id=cur_user.id)
+    if user and user.role_id in [3, 4]:
+        return user
     raise ForbiddenException
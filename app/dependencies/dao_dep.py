@@ -1,15 +1,33 @@
+import time
 from typing import AsyncGenerator
+from fastapi import Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
 from app.dao.database import async_session_maker
+from app.dao.replicas import open_read_session, replicas
 
+# Cookie with time until which reads of the client go to primary
+PRIMARY_COOKIE = "db_primary_until"
 
-async def get_session_with_commit() -> AsyncGenerator[AsyncSession, None]:
+
+async def get_session_with_commit(response: Response) -> AsyncGenerator[AsyncSession, None]:
     """
-    Async session with automatic commit
+    Async session with automatic commit.
+    Makes following reads of the client go to primary for a while,
+    so the client sees own changes.
 
     Yields:
         session
     """
+    if replicas:
+        response.set_cookie(
+            key=PRIMARY_COOKIE,
+            value=str(int(time.time()) + settings.DB_REPLICA_STICKY_SECONDS),
+            max_age=settings.DB_REPLICA_STICKY_SECONDS,
+            httponly=True,
+            samesite="lax"
+        )
+
     async with async_session_maker() as session:
         try:
             yield session
@@ -21,14 +39,21 @@ async def get_session_with_commit() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-async def get_session_no_commit() -> AsyncGenerator[AsyncSession, None]:
+async def get_session_no_commit(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
-    Async session without automatic commit
+    Async session without automatic commit.
+    Reads go to a replica, unless the client has written recently.
 
     Yields:
         session
     """
-    async with async_session_maker() as session:
+    primary_until = request.cookies.get(PRIMARY_COOKIE, "")
+    if replicas and not (primary_until.isdigit() and int(primary_until) > time.time()):
+        session = await open_read_session()
+    else:
+        session = async_session_maker()
+
+    async with session:
         try:
             yield session
         except Exception:
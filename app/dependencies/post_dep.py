@@ -1,8 +1,10 @@
-from fastapi import Depends
+from fastapi import Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.cache import get_feed_generations
 from app.api.dao import PostDAO
 from app.api.shemas import PostFullResponse, PostNotFound
-from app.auth.models import User
+from app.api.utils import is_not_modified, make_etag, validator_headers
+from app.auth.schemas import Principal
 from app.dependencies.auth_dep import get_current_user_optional
 from app.dependencies.dao_dep import get_session_no_commit
 
@@ -10,7 +12,60 @@ from app.dependencies.dao_dep import get_session_no_commit
 async def get_post_info(
         post_id: int,
         session: AsyncSession = Depends(get_session_no_commit),
-        user_data: User | None = Depends(get_current_user_optional)
+        user_data: Principal | None = Depends(get_current_user_optional)
 ) -> PostFullResponse | PostNotFound:
     id = user_data.id if user_data else None
     return await PostDAO.get_full_post_info(session=session, post_id=post_id, user_id=id)
+
+
+def check_not_modified(request: Request, response: Response,
+                       etag: str, last_modified=None) -> dict:
+    """
+    Answers 304 if the client has the current version of a resource.
+    Otherwise sets validators to the response and returns them
+    for endpoints building responses themselves.
+    """
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED,
+                            headers=headers)
+    response.headers.update(headers)
+    return headers
+
+
+async def check_post_modified(
+        post_id: int,
+        request: Request,
+        response: Response,
+        session: AsyncSession = Depends(get_session_no_commit),
+        user_data: Principal | None = Depends(get_current_user_optional)
+) -> dict:
+    """
+    Validates client's copy of the post by its version only,
+    so it must precede `get_post_info` in endpoint's parameters.
+    Errors aren't validated.
+    """
+    id = user_data.id if user_data else None
+    version = await PostDAO.get_post_version(session=session, post_id=post_id)
+    if version is None or (version.status == "draft" and version.author != id):
+        return {}
+
+    # Pages differ for authors, so versions are per user. Time of change
+    # has whole seconds, so changed fields are a part of the version too
+    etag = make_etag(request.url.path, post_id, version.status,
+                     [tag.id for tag in version.tags],
+                     version.updated_at.isoformat(), id)
+    return check_not_modified(request, response, etag, version.updated_at)
+
+
+async def check_feed_modified(request: Request, response: Response) -> dict:
+    """
+    Validates client's copy of posts list by generations of its filter,
+    so lists are validated without queries. Filters are validated
+    by the endpoint.
+    """
+    generations = await get_feed_generations(request.query_params.get("tag"),
+                                             request.query_params.get("tag_match", "exact"))
+    etag = make_etag(request.url.path, sorted(request.query_params.multi_items()),
+                     generations)
+    return check_not_modified(request, response, etag)
@@ -29,3 +29,13 @@ PostAlreadyExists = HTTPException(
     status_code=status.HTTP_409_CONFLICT,
     detail="Post with the same title already exists"
 )
+
+InvalidCursorException = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="Invalid pagination cursor"
+)
+
+InvalidSearchQueryException = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="Search query has no words"
+)
@@ -8,6 +8,10 @@ from loguru import logger
 from app.auth.router import router as router_auth
 from app.api.router import router as router_api
 from app.pages.router import router as router_pages
+from app.monitoring.logs import setup_logging
+from app.monitoring.metrics import MetricsMiddleware
+from app.monitoring.profiler import ServerTimingMiddleware
+from app.monitoring.router import router as router_monitoring
 
 
 @asynccontextmanager
@@ -15,6 +19,8 @@ async def lifespan(app: FastAPI):
     logger.info("Application initialization...")
     yield
     logger.info("Stopping application...")
+    # Write messages left in the queue of background sink
+    await logger.complete()
 
 
 def register_routers(app: FastAPI) -> None:
@@ -32,6 +38,7 @@ def register_routers(app: FastAPI) -> None:
     app.include_router(router_auth)
     app.include_router(router_api)
     app.include_router(router_pages)
+    app.include_router(router_monitoring)
 
 
 def init_app() -> FastAPI:
@@ -40,6 +47,7 @@ def init_app() -> FastAPI:
     Returns:
         Configured FastAPI app
     """
+    setup_logging()
     app = FastAPI(lifespan=lifespan, docs_url="/api")
 
     # Allow backend communicate with JS from different origin
@@ -50,6 +58,10 @@ def init_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"]
     )
+    # Count SQL statements of every request
+    app.add_middleware(ServerTimingMiddleware)
+    # Measure latencies of routes for `/metrics`
+    app.add_middleware(MetricsMiddleware)
 
     app.mount("/static",
               StaticFiles(directory="app/static"),
@@ -10,8 +10,8 @@ from alembic import context
 from app.config import database_url
 
 from app.dao.database import Base
-from app.auth.models import Role, User  
-from app.api.models import Tag, Post, PostTag
+from app.auth.models import Role, User, RevokedToken
+from app.api.models import Tag, Post, PostTag, PostCounter
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -29,6 +29,17 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# Full-text search tables are managed by migrations only,
+# see app/api/search.py
+SEARCH_TABLES = ("post_fts", "post_search")
+
+
+def include_name(name, type_, parent_names) -> bool:
+    if type_ == "table":
+        return not name.startswith(SEARCH_TABLES)
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -51,6 +62,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -60,7 +72,8 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata,
+                      include_name=include_name)
 
     with context.begin_transaction():
         context.run_migrations()
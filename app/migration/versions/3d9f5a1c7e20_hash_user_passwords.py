@@ -0,0 +1,62 @@
+"""hash user passwords
+
+Revision ID: 3d9f5a1c7e20
+Revises: 17ebcc19f412
+Create Date: 2026-10-18 12:48:31.520417
+
+"""
+import base64
+import hashlib
+import secrets
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9f5a1c7e20'
+down_revision: Union[str, None] = '17ebcc19f412'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+user_table = sa.table('user',
+                      sa.column('id', sa.Integer),
+                      sa.column('password', sa.String))
+
+# Hashing as of this revision, so the migration doesn't change with the app.
+# Hashes with other parameters than the current settings are rehashed on login
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1
+
+
+def hash_password(password: str) -> str:
+    """Returns `scrypt$n$r$p$salt$hash` string, as app.auth.utils does"""
+    salt = secrets.token_bytes(16)
+    hashed = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R,
+                            p=SCRYPT_P, maxmem=256 * SCRYPT_N * SCRYPT_R + 1024 * 1024,
+                            dklen=32)
+    encoded = [base64.urlsafe_b64encode(data).decode().rstrip("=") for data in (salt, hashed)]
+    return "$".join(["scrypt", str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P), *encoded])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Replace plaintext passwords with their hashes
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(user_table.c.id, user_table.c.password)
+        .where(user_table.c.password.not_like('scrypt$%'))
+    ).all()
+    for user_id, password in rows:
+        connection.execute(
+            user_table.update()
+            .where(user_table.c.id == user_id)
+            .values(password=hash_password(password))
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Hashes can't be reverted to passwords
+    pass
@@ -0,0 +1,58 @@
+"""add post counters
+
+Revision ID: 5c1d2e7a9b43
+Revises: 0fb4057ea468
+Create Date: 2026-10-18 10:12:41.305877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1d2e7a9b43'
+down_revision: Union[str, None] = '0fb4057ea468'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('postcounter',
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('author_id', 'tag_id', name='uq_post_counter')
+    )
+
+    # Count already existing published posts. Zero id means "any"
+    op.execute("""
+        INSERT INTO postcounter (author_id, tag_id, count)
+        SELECT 0, 0, COUNT(*) FROM post
+        WHERE status = 'published'
+        UNION ALL
+        SELECT author, 0, COUNT(*) FROM post
+        WHERE status = 'published'
+        GROUP BY author
+        UNION ALL
+        SELECT 0, posttag.tag_id, COUNT(*) FROM posttag
+        JOIN post ON post.id = posttag.post_id
+        WHERE post.status = 'published'
+        GROUP BY posttag.tag_id
+        UNION ALL
+        SELECT post.author, posttag.tag_id, COUNT(*) FROM posttag
+        JOIN post ON post.id = posttag.post_id
+        WHERE post.status = 'published'
+        GROUP BY post.author, posttag.tag_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('postcounter')
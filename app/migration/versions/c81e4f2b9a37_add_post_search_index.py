@@ -0,0 +1,63 @@
+"""add post search index
+
+Revision ID: c81e4f2b9a37
+Revises: 3d9f5a1c7e20
+Create Date: 2026-10-18 13:27:44.906135
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81e4f2b9a37'
+down_revision: Union[str, None] = '3d9f5a1c7e20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Search tables depend on database, they aren't ORM models
+    # and are skipped by autogenerate, see env.py
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_table('post_search',
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('document', postgresql.TSVECTOR(), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['post.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id')
+        )
+        op.create_index('ix_post_search_document', 'post_search', ['document'],
+                        unique=False, postgresql_using='gin')
+        op.execute(sa.text(
+            "INSERT INTO post_search (post_id, document) "
+            "SELECT id, "
+            "setweight(to_tsvector(CAST(:config AS regconfig), title), 'A') || "
+            "setweight(to_tsvector(CAST(:config AS regconfig), description), 'B') || "
+            "setweight(to_tsvector(CAST(:config AS regconfig), content), 'C') "
+            "FROM post WHERE status = 'published'"
+        ).bindparams(config=settings.SEARCH_PG_CONFIG))
+    else:
+        op.execute(
+            "CREATE VIRTUAL TABLE post_fts USING fts5("
+            "title, description, content, tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO post_fts (rowid, title, description, content) "
+            "SELECT id, title, description, content FROM post WHERE status = 'published'"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index('ix_post_search_document', table_name='post_search',
+                      postgresql_using='gin')
+        op.drop_table('post_search')
+    else:
+        op.execute("DROP TABLE post_fts")
@@ -0,0 +1,43 @@
+import random
+import sys
+
+from loguru import logger
+
+from app.config import settings
+
+WARNING_LEVEL = logger.level("WARNING").no
+
+
+def _sample(record) -> bool:
+    """
+    Drops part of messages logged with `sampled=True` field.
+    Warnings and errors are always kept
+    """
+    if not record["extra"].pop("sampled", False):
+        return True
+    return (record["level"].no >= WARNING_LEVEL
+            or random.random() < settings.LOG_SAMPLE_RATE)
+
+
+def setup_logging() -> None:
+    """
+    Replaces loguru's default handler with one configured by settings.
+
+    Messages below `LOG_LEVEL` are dropped by loguru before formatting,
+    so frequent messages should be logged on DEBUG level with data
+    passed as fields rather than formatted in advance:
+
+        logger.debug("Found {count} records", count=len(records))
+
+    Fields are also kept in `extra` of JSON records.
+    """
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level=settings.LOG_LEVEL,
+        serialize=settings.LOG_JSON,
+        filter=_sample,
+        enqueue=settings.LOG_ENQUEUE,
+        # Values of variables in tracebacks are slow to collect and may be secret
+        diagnose=False
+    )
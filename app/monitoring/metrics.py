@@ -0,0 +1,240 @@
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Iterable, TypeVar, cast
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Content type of Prometheus text format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds of histogram buckets in seconds
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DAO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    """
+    Metric of the worker. Values are changed by the event loop thread
+    only, so no locks are needed, and each worker reports its own values
+    """
+    type: str
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        """Returns lines of metric's values"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values by buckets. Counts are kept per bucket
+    and made cumulative on rendering, so observing is a bisect and 3 additions
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: tuple[float, ...] = REQUEST_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = (*buckets, float("inf"))
+        # Labels values -> [counts by buckets, sum]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [[0] * len(self.buckets), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_number(bound)}"'
+                yield (f"{self.name}_bucket"
+                       f"{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total!r}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Gauge(Metric):
+    """
+    Value which goes up and down. Value may be read by a callback
+    on rendering instead of being set
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+        self._callbacks: dict[tuple, Callable[[], float]] = {}
+
+    def inc(self, amount: float = 1, *labels) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount: float = 1, *labels) -> None:
+        self.inc(-amount, *labels)
+
+    def set_function(self, callback: Callable[[], float], *labels) -> None:
+        self._callbacks[labels] = callback
+
+    def samples(self) -> Iterable[str]:
+        values = {**self._values,
+                  **{labels: callback() for labels, callback in self._callbacks.items()}}
+        for labels, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class Registry:
+    """
+    Metrics rendered by `/metrics` endpoint
+    """
+
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: M) -> M:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+registry = Registry()
+
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being processed"))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time of handling HTTP requests",
+    ("method", "route", "status"), REQUEST_BUCKETS))
+dao_method_duration = registry.register(Histogram(
+    "dao_method_duration_seconds", "Time of DAO method calls",
+    ("method",), DAO_BUCKETS))
+db_pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time waiting for a connection from pool",
+    ("database",), POOL_WAIT_BUCKETS))
+db_pool_connections = registry.register(Gauge(
+    "db_pool_connections", "Connections of pool by state",
+    ("database", "state")))
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Pool measuring how long connections are waited for
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Label of the database, set by `track_pool`
+        self.database = ""
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started_at, self.database)
+
+    def recreate(self):
+        pool = cast(TimedQueuePool, super().recreate())
+        pool.database = self.database
+        return pool
+
+
+def track_pool(engine: AsyncEngine) -> None:
+    """
+    Reports state of engine's pool. Pool must be `TimedQueuePool`.
+    Pool is read from engine on every scrape, since disposing
+    engine replaces its pool
+    """
+    database = engine.url.render_as_string(hide_password=True)
+    _pool(engine).database = database
+
+    def pool_state(state: str) -> Callable[[], float]:
+        return lambda: getattr(_pool(engine), state)()
+
+    db_pool_connections.set_function(pool_state("checkedout"), database, "checked_out")
+    db_pool_connections.set_function(pool_state("checkedin"), database, "idle")
+    db_pool_connections.set_function(pool_state("size"), database, "size")
+    db_pool_connections.set_function(
+        lambda: max(_pool(engine).overflow(), 0), database, "overflow")
+
+
+def _pool(engine: AsyncEngine) -> TimedQueuePool:
+    return cast(TimedQueuePool, engine.sync_engine.pool)
+
+
+def observe_dao_method(method: str, started_at: float) -> None:
+    """
+    Counts call of DAO method, which started at given `perf_counter` time
+    """
+    dao_method_duration.observe(time.perf_counter() - started_at, method)
+
+
+class MetricsMiddleware:
+    """
+    Measures HTTP requests by routes. Route is the path template,
+    so posts with different ids are counted together
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            # Route is set by router. Unknown paths are counted
+            # together to keep number of series bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_duration.observe(time.perf_counter() - started_at,
+                                          scope["method"], route, status)
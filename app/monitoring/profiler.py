@@ -0,0 +1,209 @@
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.monitoring.metrics import observe_dao_method
+
+# Statements which may be explained without side effects
+EXPLAINED_STATEMENTS = ("select", "with", "insert", "update", "delete")
+EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+
+# Longer statements and parameters are cut in slow query log
+MAX_LOGGED_STATEMENT = 2000
+MAX_LOGGED_VALUE = 100
+# Values of parameters with names containing these words aren't logged
+SECRET_PARAMETERS = ("password", "token", "secret", "jti")
+
+
+@dataclass
+class QueryStats:
+    """Number and total seconds of SQL statements"""
+    queries: int = 0
+    duration: float = 0.0
+
+    def add(self, duration: float) -> None:
+        self.queries += 1
+        self.duration += duration
+
+
+@dataclass
+class RequestProfile:
+    """
+    SQL statements of a request: totals and by DAO methods.
+    Statements are counted by the innermost DAO method running them,
+    statements outside of DAO methods are counted in totals only.
+    """
+    started_at: float = field(default_factory=time.perf_counter)
+    total: QueryStats = field(default_factory=QueryStats)
+    methods: dict[str, QueryStats] = field(default_factory=dict)
+
+    def server_timing(self) -> str:
+        """
+        Returns value of Server-Timing header. Durations are in milliseconds
+        """
+        metrics = [
+            f"app;dur={(time.perf_counter() - self.started_at) * 1000:.1f}",
+            f'db;dur={self.total.duration * 1000:.1f};desc="{self.total.queries} queries"'
+        ]
+        metrics.extend(
+            f'{name};dur={stats.duration * 1000:.1f};desc="{stats.queries} queries"'
+            for name, stats in self.methods.items()
+        )
+        return ", ".join(metrics)
+
+
+# Profile of the current request and the innermost running DAO method.
+# Tasks started by the request share its profile
+current_profile: ContextVar[RequestProfile | None] = ContextVar(
+    "current_profile", default=None)
+current_method: ContextVar[str | None] = ContextVar("current_method", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._profiler_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - context._profiler_started_at
+
+    profile = current_profile.get()
+    if profile is not None:
+        profile.total.add(duration)
+        method = current_method.get()
+        if method is not None:
+            profile.methods.setdefault(method, QueryStats()).add(duration)
+
+    if 0 <= settings.DB_SLOW_QUERY_MS <= duration * 1000:
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        logged_parameters = "not logged"
+        if settings.DB_SLOW_QUERY_PARAMETERS:
+            logged_parameters = format_parameters(context, parameters)
+        logger.warning(
+            "Slow query took {duration:.1f} ms in {method}: {statement}\n"
+            "Parameters: {parameters}\nPlan:\n{plan}",
+            duration=duration * 1000, method=current_method.get() or "no DAO method",
+            statement=statement[:MAX_LOGGED_STATEMENT], parameters=logged_parameters,
+            plan=explain(conn, statement, parameters))
+
+
+def format_parameters(context, parameters) -> str:
+    """
+    Returns parameters of a statement for logging. Secret values are hidden
+    and long ones are cut. Parameters without known names may be secret,
+    so only their types are shown.
+    """
+    if isinstance(parameters, dict):
+        named = parameters.items()
+    else:
+        names = getattr(getattr(context, "compiled", None), "positiontup", None)
+        if names is None or len(names) != len(parameters):
+            return repr([type(value).__name__ for value in parameters])
+        named = zip(names, parameters)
+
+    values = []
+    for name, value in named:
+        if any(word in name.lower() for word in SECRET_PARAMETERS):
+            value = "<hidden>"
+        else:
+            value = repr(value)
+            if len(value) > MAX_LOGGED_VALUE:
+                value = value[:MAX_LOGGED_VALUE] + "..."
+        values.append(f"{name}={value}")
+    return ", ".join(values)
+
+
+def explain(conn, statement: str, parameters) -> str:
+    """
+    Returns query plan of the statement. The plan is read by a separate
+    cursor, so it isn't seen by event listeners and doesn't touch
+    results of the statement.
+    """
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().lower().startswith(EXPLAINED_STATEMENTS):
+        return "not available"
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+    except Exception as e:
+        return f"not available: {e}"
+    finally:
+        cursor.close()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Makes engine count and time its SQL statements and log slow ones
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def profile_method(method):
+    """
+    Wraps async DAO classmethod's function, so its statements are counted
+    under name of the method and the class it's called on,
+    and its calls are measured in metrics
+    """
+    @functools.wraps(method)
+    async def wrapper(cls, *args, **kwargs):
+        name = f"{cls.__name__}.{method.__name__}"
+        token = current_method.set(name)
+        started_at = time.perf_counter()
+        try:
+            return await method(cls, *args, **kwargs)
+        finally:
+            observe_dao_method(name, started_at)
+            current_method.reset(token)
+    return wrapper
+
+
+def instrument_dao(dao: type) -> None:
+    """
+    Wraps async classmethods defined in the DAO class for profiling and metrics
+    """
+    for attr, value in list(vars(dao).items()):
+        if isinstance(value, classmethod) and inspect.iscoroutinefunction(value.__func__):
+            setattr(dao, attr, classmethod(profile_method(value.__func__)))
+
+
+class ServerTimingMiddleware:
+    """
+    Profiles SQL statements of every HTTP request and adds
+    their totals to the response as Server-Timing header
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timing = profile.server_timing()
+                logger.debug("{method} {path}: {timing}", method=scope["method"],
+                             path=scope["path"], timing=timing, sampled=True)
+                if settings.SERVER_TIMING:
+                    message["headers"] = [*message.get("headers", []),
+                                          (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.monitoring.metrics import CONTENT_TYPE, registry
+
+router = APIRouter(tags=["Monitoring"])
+
+
+@router.get("/metrics", summary="Get metrics of the worker in Prometheus format")
+async def get_metrics():
+    """
+    Returns latencies of routes and DAO methods, in-flight requests
+    and state of DB pools. Each worker reports its own metrics
+    """
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -4,10 +4,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dao import PostDAO
 from app.api.shemas import PostFullResponse, PostNotFound
-from app.auth.models import User
+from app.auth.schemas import Principal
 from app.dependencies.auth_dep import get_current_user_optional
 from app.dependencies.dao_dep import get_session_no_commit
-from app.dependencies.post_dep import get_post_info
+from app.dependencies.post_dep import check_feed_modified, check_post_modified, get_post_info
+from app.exceptions import InvalidCursorException
 
 
 router = APIRouter(tags=["Frontend"])
@@ -19,20 +20,21 @@ templates = Jinja2Templates(directory="app/templates")
 async def get_post(
         request: Request,
         post_id: int,
+        validators: dict = Depends(check_post_modified),
         post_info: PostFullResponse | PostNotFound = Depends(get_post_info),
-        user_data: User | None = Depends(get_current_user_optional)
+        user_data: Principal | None = Depends(get_current_user_optional)
 ):
     if isinstance(post_info, dict):
         return templates.TemplateResponse(
             "404.html", {"request": request, "post_id": post_id}
         )
 
-    post = PostFullResponse.model_validate(post_info).model_dump()
     return templates.TemplateResponse(
         "post.html",
         {"request": request,
-         "article": post,
-         "current_user_id": user_data.id if user_data else None}
+         "article": post_info,
+         "current_user_id": user_data.id if user_data else None},
+        headers=validators
     )
 
 
@@ -43,15 +45,22 @@ async def get_posts(
     tag: str | None = None,
     page: int = 1,
     page_size: int = 3,
+    cursor: str | None = None,
+    validators: dict = Depends(check_feed_modified),
     session: AsyncSession = Depends(get_session_no_commit)
 ):
-    posts = await PostDAO.get_post_list(
-        session=session,
-        author_id=author_id,
-        tag=tag,
-        page=page,
-        page_size=page_size
-    )
+    try:
+        posts = await PostDAO.get_cached_post_list(
+            session=session,
+            author_id=author_id,
+            tag=tag,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            total="cached"
+        )
+    except ValueError:
+        raise InvalidCursorException
 
     return templates.TemplateResponse(
         "posts.html",
@@ -62,5 +71,6 @@ async def get_posts(
                 "author_id": author_id,
                 "tag": tag
             }
-        }
+        },
+        headers=validators
     )
@@ -0,0 +1,244 @@
+"""
+Generator of synthetic data for benchmarks and query plans.
+
+The same seed and volumes make the same data on any machine:
+texts, tags, authors, password hashes and timestamps of all rows don't
+depend on current time. Seeded into an empty database, ids are the same too.
+"""
+import math
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from loguru import logger
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dao import PostCounterDAO, PostSearchDAO
+from app.api.models import Post, PostCounter, PostTag, Tag
+from app.auth.models import Role, User
+from app.auth.utils import hash_password_sync
+from app.dao.base import dialect_insert
+
+# Password of all generated users
+SEED_PASSWORD = "password"
+# Time of the first generated post
+SEED_START = datetime(2024, 1, 1)
+
+# Roles by ids, admins are users with roles 3 and 4.
+# Weights are shares of generated users with the role
+ROLES = {1: "user", 2: "author", 3: "moderator", 4: "admin"}
+ROLE_WEIGHTS = (0.9, 0.08, 0.015, 0.005)
+
+WORDS = (
+    "the of and to in is that for it as with was on be by this are or from at "
+    "which an not have but all can one has more their will about if when there "
+    "so what up out time into only other some new could them these may than "
+    "then like first also over after any most would well way use work where "
+    "data code system server request query index cache page post tag user "
+    "model table value type error test build design network memory thread "
+    "python async database latency throughput release feature change review "
+    "version service client engine driver record field method class function "
+    "object stream buffer event queue worker process signal limit policy rule "
+    "search result filter order group count range scale shard replica backup"
+).split()
+
+# Spread of content sizes around the median. Sizes are log-normal,
+# as on real blogs: most posts are short, a few are very long
+CONTENT_SIZE_SIGMA = 1.0
+MIN_CONTENT_SIZE = 100
+MAX_CONTENT_SIZE = 100_000
+
+
+def make_sentences(rng: random.Random, count: int) -> list[str]:
+    """
+    Makes a pool of sentences, texts are made of them much faster
+    than of separate words
+    """
+    sentences = []
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(6, 18))
+        sentences.append(" ".join(words).capitalize() + ".")
+    return sentences
+
+
+def zipf_cum_weights(count: int, exponent: float) -> list[float]:
+    """
+    Cumulative weights of Zipf's law: item of rank k is chosen
+    with probability proportional to 1 / k ** exponent
+    """
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+async def next_id(session: AsyncSession, model) -> int:
+    """Returns id following the greatest id of the model's table"""
+    return ((await session.scalar(select(func.max(model.id)))) or 0) + 1
+
+
+async def sync_sequences(session: AsyncSession, models: list) -> None:
+    """
+    Moves PostgreSQL id sequences of the models' tables past the greatest
+    ids, so rows added later don't get ids inserted explicitly.
+    SQLite takes the next id from the table itself
+    """
+    if session.bind.dialect.name != "postgresql":
+        return
+    preparer = session.bind.dialect.identifier_preparer
+    for model in models:
+        sequence = func.pg_get_serial_sequence(preparer.format_table(model.__table__), "id")
+        last_id = select(func.max(model.id)).scalar_subquery()
+        await session.execute(select(func.setval(sequence, last_id)))
+
+
+async def insert_rows(session: AsyncSession, table, rows: list[dict],
+                      batch_size: int) -> None:
+    """
+    Inserts rows by batches. Each batch is a single executemany
+    of one compiled statement
+    """
+    for start in range(0, len(rows), batch_size):
+        await session.execute(insert(table), rows[start:start + batch_size])
+
+
+async def seed_database(session: AsyncSession, posts: int = 10000, tags: int = 1000,
+                        users: int = 100, tags_per_post: int = 3,
+                        zipf_exponent: float = 1.1, drafts_share: float = 0.1,
+                        content_size: int = 2000, search_index: bool = True,
+                        seed: int = 0, batch_size: int = 10000) -> dict:
+    """
+    Adds roles, users, tags and posts with tags. Popularity of tags and
+    activity of authors follow Zipf's law, so a few tags have most of
+    the posts and a few authors write most of them, as on real blogs.
+    Denormalized tags, post counters and search index are filled too.
+    Posts are added by batches, each batch is committed.
+
+    Args:
+        session: Async SQLAlchemy session
+        posts: Number of posts
+        tags: Number of tags
+        users: Number of users
+        tags_per_post: Max number of tags of a post
+        zipf_exponent: Skew of tags popularity and authors activity, 0 - uniform
+        drafts_share: Part of posts which are drafts
+        content_size: Median length of post's content in characters
+        search_index: Whether to add posts to full-text search index.
+                      Indexing takes most of the time of long posts
+        seed: Seed of random generator
+        batch_size: Number of rows inserted at once
+
+    Returns:
+        Dict with numbers of added rows, seconds spent and rows per second
+    """
+    started_at = time.perf_counter()
+    rng = random.Random(seed)
+    sentences = make_sentences(rng, 1000)
+    sentence_size = sum(map(len, sentences)) / len(sentences) + 1
+
+    # Missing roles only, roles may already be set up
+    role_query = dialect_insert(session, Role).on_conflict_do_nothing(index_elements=["id"])
+    await session.execute(role_query, [{"id": role_id, "name": name, "created_at": SEED_START,
+                                        "updated_at": SEED_START}
+                                       for role_id, name in ROLES.items()])
+
+    # Ids are assigned here, so links are inserted without reading ids back
+    first_user_id = await next_id(session, User)
+    first_tag_id = await next_id(session, Tag)
+    first_post_id = await next_id(session, Post)
+
+    # All users share one hash, hashing is slow by design
+    password = hash_password_sync(SEED_PASSWORD, salt=rng.randbytes(16))
+    user_ids = list(range(first_user_id, first_user_id + users))
+    roles = rng.choices(list(ROLES), weights=ROLE_WEIGHTS, k=users)
+    await insert_rows(session, User.__table__, [
+        {"id": user_id, "name": f"user{user_id}", "password": password, "role_id": role_id,
+         "created_at": SEED_START, "updated_at": SEED_START}
+        for user_id, role_id in zip(user_ids, roles)
+    ], batch_size)
+
+    tag_names = {tag_id: f"{rng.choice(WORDS)}{tag_id}"[:20]
+                 for tag_id in range(first_tag_id, first_tag_id + tags)}
+    tag_ids = list(tag_names)
+    await insert_rows(session, Tag.__table__, [
+        {"id": tag_id, "name": name, "created_at": SEED_START, "updated_at": SEED_START}
+        for tag_id, name in tag_names.items()
+    ], batch_size)
+    await session.commit()
+
+    # The first tags and users are the most popular
+    tag_weights = zipf_cum_weights(tags, zipf_exponent)
+    author_weights = zipf_cum_weights(users, zipf_exponent)
+    # Median of log-normal distribution is exp(mu)
+    content_mu = math.log(max(content_size, MIN_CONTENT_SIZE))
+    deltas = Counter()
+    links = 0
+    created_at = SEED_START
+
+    for start in range(0, posts, batch_size):
+        post_rows, link_rows, published_ids = [], [], []
+        for post_id in range(first_post_id + start,
+                             first_post_id + min(start + batch_size, posts)):
+            post_tags = sorted(set(rng.choices(tag_ids, cum_weights=tag_weights,
+                                               k=rng.randint(0, tags_per_post))))
+            author = rng.choices(user_ids, cum_weights=author_weights)[0]
+            status = "draft" if rng.random() < drafts_share else "published"
+            size = min(max(rng.lognormvariate(content_mu, CONTENT_SIZE_SIGMA),
+                           MIN_CONTENT_SIZE), MAX_CONTENT_SIZE)
+            # Posts come every 5 minutes on average, some of them are edited later
+            created_at += timedelta(seconds=round(rng.expovariate(1 / 300)) + 1)
+            updated_at = created_at
+            if rng.random() < 0.2:
+                updated_at += timedelta(seconds=rng.randint(60, 30 * 86400))
+
+            post_rows.append({
+                "id": post_id,
+                "title": f"{rng.choice(sentences)[:-1]} #{post_id}",
+                "description": " ".join(rng.choices(sentences, k=rng.randint(1, 2))),
+                "content": " ".join(rng.choices(sentences,
+                                                k=max(1, round(size / sentence_size)))),
+                "status": status,
+                "author": author,
+                "tag_list": [{"id": tag_id, "name": tag_names[tag_id]} for tag_id in post_tags],
+                "created_at": created_at,
+                "updated_at": updated_at
+            })
+            link_rows.extend({"post_id": post_id, "tag_id": tag_id, "created_at": created_at,
+                              "updated_at": created_at} for tag_id in post_tags)
+            if status == "published":
+                published_ids.append(post_id)
+                deltas.update(PostCounterDAO.post_deltas(author, post_tags, 1))
+
+        await insert_rows(session, Post.__table__, post_rows, batch_size)
+        await insert_rows(session, PostTag.__table__, link_rows, batch_size)
+        if search_index:
+            await PostSearchDAO.index_posts(session=session, post_ids=published_ids)
+        await session.commit()
+        links += len(link_rows)
+        logger.info("Seeded {done} of {total} posts", done=start + len(post_rows), total=posts)
+
+    # Same upsert as PostCounterDAO.update_counters, but executed for many
+    # rows at once instead of compiling a statement with all the values.
+    # Existing counters, e.g. the total one made by migrations, are dated
+    # by the last post too
+    counter_query = dialect_insert(session, PostCounter)
+    counter_query = counter_query.on_conflict_do_update(
+        index_elements=["author_id", "tag_id"],
+        set_={"count": PostCounter.count + counter_query.excluded.count,
+              "updated_at": counter_query.excluded.updated_at}
+    )
+    # New counters are dated by the last post
+    counter_rows = [{"author_id": author_id, "tag_id": tag_id, "count": count,
+                     "created_at": created_at, "updated_at": created_at}
+                    for (author_id, tag_id), count in deltas.items()]
+    for start in range(0, len(counter_rows), batch_size):
+        await session.execute(counter_query, counter_rows[start:start + batch_size])
+    await sync_sequences(session, [Role, User, Tag, Post])
+    await session.commit()
+
+    report = {"roles": len(ROLES), "users": users, "tags": tags, "posts": posts,
+              "post_tags": links, "counters": len(counter_rows)}
+    seconds = time.perf_counter() - started_at
+    rows = sum(report.values())
+    return {**report, "seconds": round(seconds, 2),
+            "rows_per_second": round(rows / seconds)}
@@ -0,0 +1,337 @@
+"""
+Latency and throughput of hot endpoints on a seeded SQLite database.
+
+The app is driven in-process through ASGI transport, so the numbers are
+the cost of the app and the database without network. The database is
+seeded once(see `app/seed.py`) and reused while volumes and seed stay
+the same. Feeds are read at several page depths, by page numbers and
+by cursors. Caches are off unless `--cache` is given:
+
+    poetry run python -m benchmarks.http_load --posts 1000000 --tags 10000 -o before.json
+    poetry run python -m benchmarks.http_load --posts 1000000 --tags 10000 --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+SEED_OPTIONS = ("posts", "tags", "users", "zipf_exponent", "content_size", "seed")
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # Makes url and json body of the next request
+    make_request: Callable[[int], tuple[str, dict | None]]
+    # Whether response body is the expected one, e.g. a page isn't empty.
+    # Responses failing the check are counted as errors
+    check: Callable[[dict], bool]
+
+
+def has_posts(body: dict) -> bool:
+    return bool(body.get("posts"))
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """
+    Points the app to the benchmark database. Must be called before
+    importing `app`, settings are read on import
+    """
+    os.environ["DB_URL"] = f"sqlite+aiosqlite:///{os.path.abspath(args.db)}"
+    os.environ["LOG_LEVEL"] = "WARNING"
+    os.environ["DB_SLOW_QUERY_MS"] = "-1"
+    if not args.cache:
+        for setting in ("POST_CACHE_SIZE", "FEED_CACHE_SIZE"):
+            os.environ[setting] = "0"
+
+
+def prepare_database(args: argparse.Namespace) -> None:
+    """
+    Creates and seeds the database, unless it was seeded with the same options
+    """
+    options = {option: getattr(args, option) for option in SEED_OPTIONS}
+    options_path = args.db + ".json"
+    if os.path.exists(args.db) and os.path.exists(options_path) and not args.reseed:
+        with open(options_path) as file:
+            if json.load(file) == options:
+                return
+
+    for suffix in ("", "-wal", "-shm", ".json"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+    from alembic import command
+    from alembic.config import Config
+    command.upgrade(Config("alembic.ini"), "head")
+
+    from app.dao.database import async_session_maker
+    from app.seed import seed_database
+
+    async def seed() -> dict:
+        async with async_session_maker() as session:
+            return await seed_database(session=session, posts=args.posts, tags=args.tags,
+                                       users=args.users, zipf_exponent=args.zipf_exponent,
+                                       content_size=args.content_size, seed=args.seed)
+
+    print("Seeded:", asyncio.run(seed()), file=sys.stderr)
+    with open(options_path, "w") as file:
+        json.dump(options, file)
+
+
+def make_scenarios(args: argparse.Namespace) -> list[Scenario]:
+    """
+    Makes requests of every measured endpoint. Parameters are read
+    from the database, so requests hit existing rows
+    """
+    from app.api.utils import encode_cursor
+    from app.seed import WORDS
+
+    connection = sqlite3.connect(args.db)
+    published_ids = [row[0] for row in connection.execute(
+        "SELECT id FROM post WHERE status = 'published'")]
+    # Pages past the seeded posts are empty and would be measured as cheap
+    max_depth = (len(published_ids) + args.page_size - 1) // args.page_size
+    too_deep = [depth for depth in args.depths if depth > max_depth]
+    if too_deep:
+        sys.exit(f"Depths {too_deep} are past the last page {max_depth} of "
+                 f"{len(published_ids)} published posts, seed more posts or lower --depths")
+    # Tags are ranked by popularity, the first one is the most used
+    tags = [row[0] for row in connection.execute(
+        "SELECT name FROM tag ORDER BY id")]
+    rng = random.Random(args.seed)
+
+    def feed(params: str) -> Callable[[int], tuple[str, None]]:
+        return lambda _: (f"/api/posts?page_size={args.page_size}&{params}", None)
+
+    # Rare tag is the least used one which still has published posts
+    rare_tag = connection.execute(
+        "SELECT tag.name FROM tag JOIN posttag ON posttag.tag_id = tag.id "
+        "JOIN post ON post.id = posttag.post_id WHERE post.status = 'published' "
+        "ORDER BY tag.id DESC LIMIT 1").fetchone()[0]
+
+    scenarios = [
+        Scenario("post", "GET",
+                 lambda _: (f"/api/posts/{rng.choice(published_ids)}", None),
+                 lambda body: "id" in body),
+        Scenario("feed_tag_popular", "GET", feed(f"tag={tags[0]}"), has_posts),
+        Scenario("feed_tag_rare", "GET", feed(f"tag={rare_tag}"), has_posts),
+        Scenario("feed_tag_prefix", "GET", feed(f"tag={tags[0][:3]}&tag_match=prefix"),
+                 has_posts),
+        Scenario("search", "GET", lambda _: (f"/api/search?q={rng.choice(WORDS)}", None),
+                 has_posts),
+        Scenario("tags", "GET", lambda _: ("/api/tags", None),
+                 lambda body: bool(body.get("tags"))),
+    ]
+
+    for depth in args.depths:
+        scenarios.append(Scenario(f"feed_page_{depth}", "GET", feed(f"page={depth}"),
+                                  has_posts))
+        if depth == 1:
+            continue
+        # Cursor pointing to the same depth as the page number
+        row = connection.execute(
+            "SELECT created_at, id FROM post WHERE status = 'published' "
+            "ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?",
+            ((depth - 1) * args.page_size - 1,)
+        ).fetchone()
+        cursor = encode_cursor(datetime.fromisoformat(row[0]), row[1])
+        scenarios.append(Scenario(f"feed_cursor_{depth}", "GET", feed(f"cursor={cursor}"),
+                                  has_posts))
+
+    run_id = f"{time.time_ns():x}"
+    scenarios.append(Scenario(
+        "add_post", "POST",
+        lambda number: ("/api/posts", {
+            "title": f"Benchmark post {run_id}-{number}",
+            "description": "Post added by benchmark",
+            "content": " ".join(rng.choices(WORDS, k=200)),
+            "tags": rng.sample(tags[:50], 3)
+        }),
+        lambda body: body.get("status") == "success"
+    ))
+    connection.close()
+
+    if args.only:
+        scenarios = [scenario for scenario in scenarios if scenario.name in args.only]
+    return scenarios
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    """
+    Returns percentiles of latencies in milliseconds and requests per second
+    """
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+    }
+
+
+async def run_scenario(client, scenario: Scenario, requests: int,
+                       concurrency: int, warmup: int) -> dict:
+    number = 0
+
+    async def send() -> tuple[float, bool]:
+        nonlocal number
+        number += 1
+        url, body = scenario.make_request(number)
+        start = time.perf_counter()
+        response = await client.request(scenario.method, url, json=body)
+        latency = time.perf_counter() - start
+        return latency, response.status_code < 400 and scenario.check(response.json())
+
+    for _ in range(warmup):
+        await send()
+
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker(count: int) -> None:
+        nonlocal errors
+        for _ in range(count):
+            latency, ok = await send()
+            latencies.append(latency)
+            errors += not ok
+
+    # Requests are split between workers, each worker sends them one by one
+    shares = [requests // concurrency + (i < requests % concurrency)
+              for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(share) for share in shares))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+    from app.main import app
+    from app.seed import SEED_PASSWORD
+
+    scenarios = make_scenarios(args)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async with app.router.lifespan_context(app):
+            response = await client.post("/auth/login", json={"name": "user1",
+                                                              "password": SEED_PASSWORD})
+            response.raise_for_status()
+            for scenario in scenarios:
+                results[scenario.name] = await run_scenario(
+                    client, scenario, args.requests, args.concurrency, args.warmup)
+                print(f"{scenario.name:>20}: " + ", ".join(
+                    f"{key} {value}" for key, value in results[scenario.name].items()),
+                    file=sys.stderr)
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, max_regression: float | None) -> bool:
+    """
+    Prints changes against baseline results.
+    Returns False if p95 of any scenario grew more than `max_regression` percent
+    """
+    passed = True
+    print(f"{'scenario':>20} {'p50 ms':>18} {'p95 ms':>18} {'rps':>18}")
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+
+        def change(key: str) -> str:
+            percent = (result[key] - base[key]) / base[key] * 100 if base[key] else 0
+            return f"{base[key]:>8} -> {result[key]:<8}({percent:+.0f}%)"
+
+        print(f"{name:>20} {change('p50_ms')} {change('p95_ms')} {change('rps')}")
+        if (max_regression is not None and base["p95_ms"]
+                and result["p95_ms"] > base["p95_ms"] * (1 + max_regression / 100)):
+            passed = False
+    return passed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="data/bench.sqlite3", help="Path to benchmark database")
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--tags", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--zipf-exponent", type=float, default=1.1,
+                        help="Skew of tags popularity and authors activity")
+    parser.add_argument("--content-size", type=int, default=2000,
+                        help="Median length of post's content in characters")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of data and requests")
+    parser.add_argument("--reseed", action="store_true", help="Seed the database again")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="Requests before measuring")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Requests sent at once")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 10, 100, 1000],
+                        help="Page numbers of feeds to measure")
+    parser.add_argument("--only", nargs="+", help="Names of scenarios to run")
+    parser.add_argument("--cache", action="store_true", help="Keep caches of the app on")
+    parser.add_argument("--output", "-o", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results to compare with")
+    parser.add_argument("--max-regression", type=float,
+                        help="Fail if p95 of a scenario grew more than this percent")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    from app.monitoring.logs import setup_logging
+    setup_logging()
+    prepare_database(args)
+    results = asyncio.run(run(args))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "options": {key: value for key, value in vars(args).items()
+                        if key not in ("output", "compare", "max_regression")}
+        },
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    passed = True
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        passed = compare(results, baseline, args.max_regression)
+
+    # Failed or empty responses make latencies meaningless
+    failed = [name for name, result in results.items() if result["errors"]]
+    if failed:
+        print(f"Scenarios with errors: {', '.join(failed)}", file=sys.stderr)
+        passed = False
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Throughput of logins and stall of the event loop during a burst of logins.
+
+A burst of concurrent password checks runs while a probe coroutine
+measures how late the event loop wakes it up, that's the delay other
+requests of the same worker get. Checks are run inline and offloaded
+to threads for comparison:
+
+    poetry run python -m benchmarks.login_throughput --logins 100 --threads 2
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.auth.utils import hash_password_sync, verify_password, verify_password_sync
+from app.config import settings
+
+PASSWORD = "benchmark-password"
+PROBE_INTERVAL = 0.005
+
+
+async def probe_loop_lag(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def run(logins: int, offload: bool, hashed_password: str) -> dict:
+    async def login() -> None:
+        if offload:
+            await verify_password(PASSWORD, hashed_password)
+        else:
+            verify_password_sync(PASSWORD, hashed_password)
+
+    stop = asyncio.Event()
+    lags: list[float] = []
+    probe = asyncio.create_task(probe_loop_lag(stop, lags))
+    # Let the probe start before the burst
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    lags.sort()
+    return {
+        "mode": "threads" if offload else "inline",
+        "logins_per_sec": logins / elapsed,
+        "lag_p50_ms": statistics.median(lags) * 1000 if lags else None,
+        "lag_max_ms": lags[-1] * 1000 if lags else None
+    }
+
+
+async def main(logins: int) -> None:
+    hashed_password = hash_password_sync(PASSWORD)
+    print(f"scrypt N={settings.PASSWORD_SCRYPT_N} r={settings.PASSWORD_SCRYPT_R} "
+          f"p={settings.PASSWORD_SCRYPT_P}, threads={settings.PASSWORD_HASH_THREADS}, "
+          f"logins={logins}")
+    for offload in (False, True):
+        result = await run(logins, offload, hashed_password)
+        lag_p50 = "-" if result["lag_p50_ms"] is None else f"{result['lag_p50_ms']:.1f}"
+        lag_max = "-" if result["lag_max_ms"] is None else f"{result['lag_max_ms']:.1f}"
+        print(f"{result['mode']:>8}: {result['logins_per_sec']:8.1f} logins/s, "
+              f"loop lag p50 {lag_p50} ms, max {lag_max} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=100,
+                        help="Number of concurrent logins")
+    parser.add_argument("--threads", type=int, default=settings.PASSWORD_HASH_THREADS,
+                        help="Max threads hashing passwords")
+    args = parser.parse_args()
+
+    settings.PASSWORD_HASH_THREADS = args.threads
+    asyncio.run(main(args.logins))
@@ -0,0 +1,79 @@
+"""
+Cost of encoding a page of posts to JSON per post.
+
+Compares the old path of feeds(validating every ORM row into pydantic
+model, then `jsonable_encoder` and `json.dumps` by FastAPI) with the
+current one(rows mapped to dicts and encoded by pydantic-core at once):
+
+    poetry run python -m benchmarks.serialization --posts 20 --content-size 5000
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.shemas import PostFullResponse, PostSummary
+from app.api.utils import PydanticJSONResponse
+
+
+def make_rows(posts: int, content_size: int) -> list[SimpleNamespace]:
+    """
+    Makes stand-ins of ORM posts with loaded author and tags
+    """
+    user = SimpleNamespace(id=1, name="vladimir")
+    tags = [SimpleNamespace(id=i, name=f"tag{i}") for i in range(3)]
+    return [
+        SimpleNamespace(id=i, author=1, title=f"Post {i}", description="Short description",
+                        content="x" * content_size, created_at=datetime(2025, 4, 16, 7, 30),
+                        updated_at=datetime(2025, 4, 16, 7, 30), status="published",
+                        tags=tags, user=user, author_name=user.name)
+        for i in range(posts)
+    ]
+
+
+def validated_models(rows: list) -> bytes:
+    """Old path: full models validated per row, encoded by FastAPI"""
+    page = {"page": 1, "posts": [PostFullResponse.model_validate(row) for row in rows]}
+    return json.dumps(jsonable_encoder(page), ensure_ascii=False).encode()
+
+
+def summary_models(rows: list) -> bytes:
+    """Summaries validated per row, encoded by FastAPI"""
+    page = {"page": 1, "posts": [PostSummary.model_validate(row) for row in rows]}
+    return json.dumps(jsonable_encoder(page), ensure_ascii=False).encode()
+
+
+def mapped_dicts(rows: list) -> bytes:
+    """Current path: rows mapped to dicts, encoded by pydantic-core"""
+    posts = [
+        {"id": row.id, "author": row.author, "title": row.title,
+         "description": row.description, "created_at": row.created_at,
+         "status": row.status, "tags": [{"id": tag.id, "name": tag.name} for tag in row.tags],
+         "author_id": row.author, "author_name": row.author_name}
+        for row in rows
+    ]
+    return bytes(PydanticJSONResponse({"page": 1, "posts": posts}).body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=20, help="Posts in a page")
+    parser.add_argument("--content-size", type=int, default=5000,
+                        help="Length of post's content")
+    parser.add_argument("--repeat", type=int, default=500, help="Pages encoded per run")
+    args = parser.parse_args()
+
+    rows = make_rows(args.posts, args.content_size)
+    for encode in (validated_models, summary_models, mapped_dicts):
+        seconds = min(timeit.repeat(lambda: encode(rows), number=args.repeat, repeat=3))
+        per_post = seconds / args.repeat / args.posts * 1e6
+        print(f"{encode.__name__:>16}: {per_post:7.2f} us per post, "
+              f"{len(encode(rows)):8d} bytes per page")
+
+
+if __name__ == "__main__":
+    main()
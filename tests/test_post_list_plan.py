@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from typing import Literal
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.dao import PostDAO
+from app.api.models import Post, PostCounter, PostTag, Tag
+from app.auth.models import Role, User
+from app.dao.database import Base, make_engine
+
+FEED_INDEX = "ix_post_status_created_at_id"
+TAG_INDEX = "ix_posttag_tag_id_post_id"
+
+
+class PostListPlanTest(unittest.IsolatedAsyncioTestCase):
+    """
+    Feeds filtered by a rare tag must be read starting from the tag's links,
+    not by walking the feed index over all published posts. Feeds of
+    a common tag must walk the feed index instead of sorting all its posts
+    """
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = make_engine(
+            f"sqlite+aiosqlite:///{os.path.join(self.directory.name, 'plan.sqlite3')}")
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            await connection.execute(insert(Role), [{"id": 1, "name": "user"}])
+            await connection.execute(insert(User), [{"id": 1, "name": "author",
+                                                     "password": "-", "role_id": 1}])
+            await connection.execute(insert(Tag), [{"id": 1, "name": "popular"},
+                                                   {"id": 2, "name": "rare"}])
+            await connection.execute(insert(Post), [
+                {"id": post_id, "title": f"Post {post_id}", "description": "",
+                 "content": "", "author": 1,
+                 "status": "published" if post_id % 10 else "draft"}
+                for post_id in range(1, 201)
+            ])
+            await connection.execute(insert(PostTag), [
+                {"post_id": post_id, "tag_id": 2 if post_id % 20 == 5 else 1}
+                for post_id in range(1, 201)
+            ])
+            # 180 published posts: 170 with the popular tag, 10 with the rare one
+            await connection.execute(insert(PostCounter), [
+                {"author_id": 0, "tag_id": 0, "count": 180},
+                {"author_id": 0, "tag_id": 1, "count": 170},
+                {"author_id": 0, "tag_id": 2, "count": 10},
+            ])
+
+        self.statements = []
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self.capture)
+        self.session_maker = async_sessionmaker(self.engine, class_=AsyncSession,
+                                                expire_on_commit=False)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+        self.directory.cleanup()
+
+    def capture(self, conn, cursor, statement, parameters, context, executemany):
+        # Counters are read to choose the plan, they aren't a part of it
+        if not statement.startswith("EXPLAIN") and "FROM postcounter" not in statement:
+            self.statements.append((statement, parameters))
+
+    async def plans(self, **filters) -> list[str]:
+        """
+        Lists posts and returns plans of the executed statements
+        """
+        async with self.session_maker() as session:
+            self.statements.clear()
+            await PostDAO.get_post_list(session=session, **filters)
+            connection = await session.connection()
+            plans = []
+            for statement, parameters in list(self.statements):
+                result = await connection.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters)
+                plans.append("\n".join(row[-1] for row in result))
+            return plans
+
+    async def test_tag_feed_starts_from_tag_links(self):
+        for tag_match, tag in (("exact", "rare"), ("prefix", "ra")):
+            for total in ("exact", "none"):
+                with self.subTest(tag_match=tag_match, total=total):
+                    plans = await self.plans(tag=tag, tag_match=tag_match, total=total)
+                    self.assertEqual(len(plans), 2 if total == "exact" else 1)
+                    for plan in plans:
+                        self.assertIn(TAG_INDEX, plan)
+                        self.assertNotIn(FEED_INDEX, plan)
+                        self.assertIn("USING INTEGER PRIMARY KEY", plan)
+
+    async def test_popular_tag_feed_walks_feed_index(self):
+        cases: list[tuple[Literal["exact", "prefix"], str]] = [("exact", "popular"), ("prefix", "po")]
+        for tag_match, tag in cases:
+            async with self.session_maker() as session:
+                first_page = await PostDAO.get_post_list(session=session, tag=tag,
+                                                         tag_match=tag_match, total="none")
+            for paging in ({"page": 1}, {"page": 2}, {"cursor": first_page["next_cursor"]}):
+                with self.subTest(tag_match=tag_match, paging=paging):
+                    plans = await self.plans(tag=tag, tag_match=tag_match, total="none", **paging)
+                    self.assertEqual(len(plans), 1)
+                    self.assertIn(FEED_INDEX, plans[0])
+                    self.assertNotIn("TEMP B-TREE", plans[0])
+
+    async def test_unfiltered_feed_walks_feed_index(self):
+        plans = await self.plans(total="none")
+        self.assertIn(FEED_INDEX, plans[0])
+        self.assertNotIn("TEMP B-TREE", plans[0])
+
+
+if __name__ == "__main__":
+    unittest.main()